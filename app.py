@@ -1,4 +1,4 @@
-from flask import Flask, json, render_template, request, jsonify, send_file, session, redirect, url_for, flash, Response, send_from_directory,stream_with_context
+from flask import Flask, json, render_template, request, jsonify, send_file, session, redirect, url_for, flash, Response, send_from_directory,stream_with_context,make_response
 from flask_login import LoginManager, UserMixin, login_user, logout_user, login_required, current_user
 from werkzeug.security import generate_password_hash, check_password_hash
 from flask_wtf import FlaskForm
@@ -10,7 +10,9 @@ from src.agents.planner import Planner
 from src.agents.researcher import Researcher
 from src.agents.coder import Coder
 from src.agents.project_creator import ProjectCreator
-from src.keyword_extractor import SentenceBert
+from src.llm import RetryPolicy, response_cache
+from src.keyword_extractor import extract_keywords, stats as keyword_stats
+from src.browser.search_cache import search_cache
 from utils import prepare_coding_files, search_queries
 import os
 import zipfile
@@ -23,7 +25,7 @@ import json
 from urllib.parse import urlparse
 import subprocess,sys
 from dotenv import load_dotenv
-from s3.s3_client import allowed_file, get_profile_pic_url, upload_profile_picture, delete_profile_picture,upload_project_file,list_project_files,delete_project_file,get_project_file_content,save_full_project
+from s3.s3_client import allowed_file, get_profile_pic_url, upload_profile_picture, delete_profile_picture,upload_project_file,list_project_files,list_project_metadata,get_project_file,delete_project_file,move_project_file,move_project_directory,save_full_project,stream_project_zip,get_project_archive_url
 import logging
 
 # Initialize logger
@@ -302,7 +304,8 @@ def load_workspace_project():
     if not project_name:
         return jsonify({"error": "Project name required"}), 400
 
-    files = list_project_files(
+    # Tree only; the IDE fetches each file's content when it is opened
+    files = list_project_metadata(
         user_id=current_user.id,
         project_id=project_name
     )
@@ -316,7 +319,8 @@ def load_workspace_project():
 
     return jsonify({
         "project": project_name,
-        "files": files
+        "files": files,
+        "count": len(files)
     })
 
 @app.route('/login', methods=['GET', 'POST'])
@@ -422,7 +426,8 @@ def profile():
 
         return redirect(url_for("profile"))
 
-    profile_pic_url = get_profile_pic_url(current_user.profile_picture)
+    # Shown in a 96px box; "md" covers 2x displays
+    profile_pic_url = get_profile_pic_url(current_user.profile_picture, size="md")
 
     return render_template(
         "profile.html",
@@ -493,7 +498,7 @@ def account_settings():
             if form.current_password.data and form.new_password.data:
                 if not check_password_hash(current_user.password, form.current_password.data):
                     flash('Current password is incorrect', 'error')
-                    return render_template('account_settings.html', form=form, profile_pic_url=get_profile_pic_url(current_user.profile_picture))
+                    return render_template('account_settings.html', form=form, profile_pic_url=get_profile_pic_url(current_user.profile_picture, size="md"))
                 current_user.password = generate_password_hash(form.new_password.data)
                 flash('Password updated successfully!', 'success')
 
@@ -509,7 +514,7 @@ def account_settings():
             db.session.rollback()
             flash(f'Error updating account settings: {str(e)}', 'error')
 
-    return render_template('account_settings.html', form=form, profile_pic_url=get_profile_pic_url(current_user.profile_picture))
+    return render_template('account_settings.html', form=form, profile_pic_url=get_profile_pic_url(current_user.profile_picture, size="md"))
 
 @app.route('/configure', methods=['GET', 'POST'])
 @login_required
@@ -573,6 +578,28 @@ def workspace():
         selected_model=selected_model
     )
 
+def forward_deltas(stream, event_type):
+    """
+    Re-emit (attempt, chunk) pairs from an agent's stream() as NDJSON delta
+    events and hand back the agent's final result.
+    """
+    while True:
+        try:
+            attempt, chunk = next(stream)
+        except StopIteration as stop:
+            return stop.value
+        yield json.dumps({'type': event_type, 'attempt': attempt, 'delta': chunk}) + "\n"
+
+@app.route('/api/metrics', methods=['GET'])
+@login_required
+def cache_metrics():
+    """Hit ratios and time saved by the in-process caches of this worker."""
+    return jsonify({
+        'llm_response_cache': response_cache.stats(),
+        'keyword_extractor': keyword_stats(),
+        'search_cache': search_cache.stats() if search_cache else None,
+    })
+
 @app.route('/api/process', methods=['POST'])
 @login_required
 def process_prompt():
@@ -613,11 +640,14 @@ def process_prompt():
             db.session.add(conversation)
             db.session.commit()
 
+            # One retry/deadline budget shared by every agent in this request
+            retry_policy = RetryPolicy()
+
             # -------------------------
             # Decision
             # -------------------------
             try:
-                decision_taker = DecisionTaker(config['model'], config['api_key'])
+                decision_taker = DecisionTaker(config['model'], config['api_key'], retry_policy=retry_policy)
                 decision_list = decision_taker.execute(prompt)
                 decision = decision_list[0] if decision_list else None
             except Exception as e:
@@ -655,8 +685,8 @@ def process_prompt():
 
                 # -------- Planner --------
                 try:
-                    planner = Planner(config['model'], config['api_key'])
-                    model_reply, planner_json = planner.execute(prompt)
+                    planner = Planner(config['model'], config['api_key'], retry_policy=retry_policy)
+                    model_reply, planner_json = yield from forward_deltas(planner.stream(prompt), 'planner_delta')
                 except Exception as e:
                     logger.error("Planner failed: %s", e)
                     planner_json = {}
@@ -666,8 +696,7 @@ def process_prompt():
 
                 # -------- Keywords --------
                 try:
-                    keyword_extractor = SentenceBert()
-                    keywords = keyword_extractor.extract_keywords(prompt)
+                    keywords = extract_keywords(prompt)
                 except Exception as e:
                     logger.error("Keyword extraction failed: %s", e)
                     keywords = []
@@ -676,7 +705,7 @@ def process_prompt():
 
                 # -------- Research --------
                 try:
-                    researcher = Researcher(config['model'], config['api_key'])
+                    researcher = Researcher(config['model'], config['api_key'], retry_policy=retry_policy)
                     researcher_output = researcher.execute(planner_json.get("plans", {}), keywords)
                 except Exception as e:
                     logger.error("Researcher failed: %s", e)
@@ -695,8 +724,11 @@ def process_prompt():
 
                 # -------- Code generation --------
                 try:
-                    coder = Coder(config['model'], config['api_key'])
-                    coder_output = coder.execute(planner_json.get("plans", {}), prompt, queries_result)
+                    coder = Coder(config['model'], config['api_key'], retry_policy=retry_policy)
+                    coder_output = yield from forward_deltas(
+                        coder.stream(planner_json.get("plans", {}), prompt, queries_result),
+                        'coder_delta'
+                    )
                     if not isinstance(coder_output, list):
                         coder_output = []
                 except Exception as e:
@@ -708,7 +740,7 @@ def process_prompt():
                 # -------- Project creation --------
                 try:
                     files = prepare_coding_files(coder_output)
-                    project_creator = ProjectCreator(config['model'], config['api_key'])
+                    project_creator = ProjectCreator(config['model'], config['api_key'], retry_policy=retry_policy)
                     project_output = project_creator.execute(planner_json.get("project", "Untitled Project"), files)
                 except Exception as e:
                     logger.error("Project creation failed: %s", e)
@@ -723,10 +755,8 @@ def process_prompt():
                     db.session.add(project)
                     db.session.commit()
 
-                    for file_path, content in project_output.get("files", {}).items():
-                        upload_project_file(user_id=user_id, project_id=project_name, file_path=file_path, content=content)
-
-                    save_full_project(user_id=user_id, project_id=project_name, files={}, metadata={
+                    # All files go up in parallel; the manifest is written last
+                    save_full_project(user_id=user_id, project_id=project_name, files=project_output.get("files", {}), metadata={
                         "project_name": project_name,
                         "model": config["model"],
                         "created_at": datetime.now(UTC).isoformat(),
@@ -751,6 +781,8 @@ def process_prompt():
 
                 yield json.dumps({'type': 'conversation', 'content': "You can now open this project in the IDE."}) + "\n"
 
+                logger.info("LLM attempts for conversation %s: %s", conversation.id, retry_policy.summary())
+
     return Response(stream_with_context(generate()), mimetype='application/json')
 
 @app.route('/api/download_project', methods=['POST'])
@@ -979,7 +1011,7 @@ def load_workspace_project_internal(user_id, project_id):
     """
     Check if user has any project files in S3
     """
-    files = list_project_files(user_id, project_id)
+    files = list_project_metadata(user_id, project_id)
     return bool(files)
     
 @app.route("/api/ide/save_file", methods=["POST"])
@@ -1013,8 +1045,16 @@ def load_ide_files():
 @login_required
 def manage_ide_files():
     try:
+        project_id = session.get("active_project")
+        if not project_id:
+            return jsonify({'error': 'No active project'}), 400
+
         if request.method == 'GET':
-            files = list_project_files(current_user.id)
+            # ?include=content keeps the old full-content response
+            if request.args.get('include') == 'content':
+                files = list_project_files(current_user.id, project_id)
+            else:
+                files = list_project_metadata(current_user.id, project_id)
             return jsonify({
                 'files': files,
                 'count': len(files)
@@ -1031,7 +1071,7 @@ def manage_ide_files():
             if any(x in file_path for x in ['..', '~']):
                 return jsonify({'error': 'Invalid file path'}), 400
 
-            upload_project_file(file_path, content, current_user.id)
+            upload_project_file(current_user.id, project_id, file_path, content)
 
             return jsonify({
                 'message': 'File created successfully',
@@ -1047,7 +1087,7 @@ def manage_ide_files():
             if not file_path or content is None:
                 return jsonify({'error': 'File path and content are required'}), 400
 
-            upload_project_file(file_path, content, current_user.id)
+            upload_project_file(current_user.id, project_id, file_path, content)
 
             return jsonify({
                 'message': 'File updated successfully',
@@ -1062,13 +1102,51 @@ def manage_ide_files():
             if not file_path:
                 return jsonify({'error': 'File path is required'}), 400
 
-            delete_project_file(file_path, current_user.id)
+            delete_project_file(current_user.id, project_id, file_path)
 
             return jsonify({'message': 'File deleted successfully'})
 
     except Exception as e:
         return jsonify({'error': str(e)}), 500
     
+@app.route('/api/ide/file', methods=['GET'])
+@login_required
+def get_ide_file():
+    """
+    One file's content. Supports conditional GET: a matching If-None-Match
+    gets a 304 and S3 never sends the body either.
+    """
+    file_path = request.args.get('path')
+    project_id = session.get("active_project")
+
+    if not file_path or not project_id:
+        return jsonify({'error': 'File path and active project are required'}), 400
+
+    etags = list(request.if_none_match)
+    result = get_project_file(
+        current_user.id,
+        project_id,
+        file_path,
+        if_none_match=etags[0] if len(etags) == 1 else None
+    )
+
+    if result is None:
+        return jsonify({'error': 'File not found'}), 404
+
+    if result["not_modified"]:
+        response = make_response('', 304)
+    else:
+        response = jsonify({
+            'file_path': file_path,
+            'content': result["content"],
+            'last_modified': result["last_modified"]
+        })
+
+    response.set_etag(result["etag"])
+    # Always revalidate, so edits made elsewhere show up on the next open
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
 @app.route('/api/ide/create_file', methods=['POST'])
 @login_required
 def create_ide_file():
@@ -1123,26 +1201,18 @@ def rename_ide_file():
     new_path = data["new_path"]
     project_id = session.get("config", {}).get("project_name")
 
-    content = get_project_file_content(
-        current_user.id,
-        project_id,
-        old_path
-    )
-
-    upload_project_file(
-        current_user.id,
-        project_id,
-        new_path,
-        content
-    )
+    # Server-side copy + delete; falls back to a folder rename
+    if move_project_file(current_user.id, project_id, old_path, new_path):
+        return jsonify({"message": "Renamed successfully"})
 
-    delete_project_file(
-        current_user.id,
-        project_id,
-        old_path
-    )
+    try:
+        moved = move_project_directory(current_user.id, project_id, old_path, new_path)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if not moved:
+        return jsonify({"error": "File not found"}), 404
 
-    return jsonify({"message": "Renamed successfully"})
+    return jsonify({"message": "Renamed successfully", "count": moved})
 
 
 @app.route('/api/ide/download_file', methods=['POST'])
@@ -1373,23 +1443,23 @@ def create_sample_project_structure():
 def export_ide_project():
     project_id = session.get("config", {}).get("project_name")
 
-    files = list_project_files(
-        current_user.id,
-        project_id
-    )
-
-    memory_file = io.BytesIO()
-    with zipfile.ZipFile(memory_file, 'w') as zf:
-        for path, data in files.items():
-            zf.writestr(path, data["content"])
+    if not project_id:
+        return jsonify({"error": "No active project"}), 400
 
-    memory_file.seek(0)
+    # Cached archive for this exact project state, downloaded straight from S3;
+    # on a miss it is built in the background while this request streams
+    try:
+        archive_url = get_project_archive_url(current_user.id, project_id)
+        if archive_url:
+            return redirect(archive_url, code=303)
+    except Exception as e:
+        logger.error("Archive cache failed for %s: %s", project_id, e)
 
-    return send_file(
-        memory_file,
+    # Built while it is sent (chunked), never held in memory as a whole
+    return Response(
+        stream_project_zip(current_user.id, project_id),
         mimetype="application/zip",
-        as_attachment=True,
-        download_name=f"{project_id}.zip"
+        headers={"Content-Disposition": f'attachment; filename="{secure_filename(project_id)}.zip"'}
     )
 
 # Initialize database
@@ -0,0 +1,90 @@
+# benchmark_keywords.py
+"""
+Compare the statistical keyword backend against KeyBERT.
+
+Usage:
+    python benchmark_keywords.py [prompts.txt]
+
+Without a file, user prompts are read from the conversations table.
+"""
+import statistics
+import sys
+import time
+
+from src.keyword_extractor import SentenceBert, StatisticalKeywords
+
+
+def load_prompts(path=None, limit=500):
+    if path:
+        with open(path, encoding="utf-8") as f:
+            return [line.strip() for line in f if line.strip()][:limit]
+
+    from app import app, Conversation
+
+    prompts = []
+    with app.app_context():
+        for conversation in Conversation.query.limit(limit):
+            prompts.extend(
+                m["content"] for m in conversation.messages or []
+                if m.get("role") == "user" and m.get("content")
+            )
+    return prompts[:limit]
+
+
+def time_backend(extractor, prompts, top_n):
+    results, latencies = [], []
+    for prompt in prompts:
+        started = time.perf_counter()
+        results.append(extractor.extract_keywords(prompt, top_n))
+        latencies.append(time.perf_counter() - started)
+    return results, latencies
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+def report(name, latencies):
+    print(
+        f"{name:<12} p50={percentile(latencies, 0.50) * 1000:8.2f}ms "
+        f"p99={percentile(latencies, 0.99) * 1000:8.2f}ms "
+        f"mean={statistics.mean(latencies) * 1000:8.2f}ms"
+    )
+
+
+def main(top_n=5):
+    prompts = load_prompts(sys.argv[1] if len(sys.argv) > 1 else None)
+    if not prompts:
+        print("No prompts to benchmark")
+        return
+
+    started = time.perf_counter()
+    keybert = SentenceBert()
+    print(f"KeyBERT load: {time.perf_counter() - started:.2f}s")
+
+    started = time.perf_counter()
+    fast = StatisticalKeywords()
+    print(f"Statistical load: {time.perf_counter() - started:.4f}s")
+
+    # Warm up so model initialisation isn't counted as latency
+    keybert.extract_keywords(prompts[0], top_n)
+
+    reference, keybert_latency = time_backend(keybert, prompts, top_n)
+    candidate, fast_latency = time_backend(fast, prompts, top_n)
+
+    overlaps = []
+    for expected, actual in zip(reference, candidate):
+        union = set(expected) | set(actual)
+        if union:
+            overlaps.append(len(set(expected) & set(actual)) / len(union))
+
+    print(f"\n{len(prompts)} prompts, top_n={top_n}")
+    report("keybert", keybert_latency)
+    report("statistical", fast_latency)
+    if overlaps:
+        print(f"Jaccard overlap with KeyBERT: mean={statistics.mean(overlaps):.3f}")
+
+
+if __name__ == "__main__":
+    main()
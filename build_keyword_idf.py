@@ -0,0 +1,24 @@
+# build_keyword_idf.py
+from app import app, Conversation
+from src.keyword_extractor import build_idf_table, save_idf_table
+from src.keyword_extractor.statistical import IDF_PATH
+
+
+def user_prompts():
+    for conversation in Conversation.query.yield_per(500):
+        for message in conversation.messages or []:
+            if message.get("role") == "user" and message.get("content"):
+                yield message["content"]
+
+
+def build():
+    with app.app_context():
+        table = build_idf_table(user_prompts())
+
+    save_idf_table(table, IDF_PATH)
+    print(f"Wrote IDF table for {table['documents']} prompts "
+          f"({len(table['df'])} terms) to {IDF_PATH}")
+
+
+if __name__ == "__main__":
+    build()
@@ -0,0 +1,16 @@
+# gunicorn.conf.py
+import os
+
+
+def post_fork(server, worker):
+    """Warm the shared KeyBERT model so the first /api/process call doesn't pay for it."""
+    if os.environ.get("PRELOAD_KEYWORD_MODEL", "1") != "1":
+        return
+
+    from src.keyword_extractor import preload
+
+    try:
+        preload()
+        server.log.info("Keyword model preloaded in worker %s", worker.pid)
+    except Exception as e:
+        server.log.warning("Keyword model preload failed: %s", e)
@@ -0,0 +1,19 @@
+# migrate_projects.py
+from s3.s3_client import iter_projects, migrate_project
+
+
+def migrate():
+    projects = 0
+    files = 0
+    for user_id, project_id in iter_projects():
+        try:
+            files += migrate_project(user_id, project_id)
+            projects += 1
+        except Exception as e:
+            print(f"Failed to migrate {user_id}/{project_id}: {e}")
+
+    print(f"Checked {projects} projects ({files} files)")
+
+
+if __name__ == "__main__":
+    migrate()
@@ -1,11 +1,21 @@
 from dotenv import load_dotenv
 load_dotenv()
+import hashlib
+import io
 import json
 import boto3
 import os
-from datetime import datetime
+import random
+import threading
+import time
+import zipfile
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
 from werkzeug.utils import secure_filename
 from botocore.client import Config
+from botocore.exceptions import BotoCoreError, ClientError
+from PIL import Image, ImageOps, UnidentifiedImageError
 
 # ==============================
 # Configuration
@@ -19,9 +29,51 @@ S3_SECRET_KEY = os.getenv("S3_SECRETKEY")
 
 S3_PROFILE_FOLDER = "profile_pictures/"
 S3_PROJECTS_FOLDER = "projects/"
+# Bookkeeping objects inside a project prefix; never shown as project files
+S3_PROJECT_INTERNAL = ".nexa/"
+MANIFEST_FILE = f"{S3_PROJECT_INTERNAL}manifest.json"
+MANIFEST_VERSION = 2
+MANIFEST_WRITE_ATTEMPTS = int(os.getenv("S3_MANIFEST_WRITE_ATTEMPTS", "8"))
+# Returned by S3/MinIO when an IfMatch/IfNoneMatch put loses a race
+MANIFEST_CONFLICT_CODES = {"PreconditionFailed", "412", "ConditionalRequestConflict", "409"}
+S3_BLOBS_FOLDER = "blobs/sha256/"
+ARCHIVES_FOLDER = f"{S3_PROJECT_INTERNAL}archives/"
 
 ALLOWED_EXTENSIONS = {"png", "jpg", "jpeg", "gif"}
 
+# Square thumbnails generated on upload; templates use the small ones
+PROFILE_VARIANTS = {"sm": 64, "md": 192}
+PROFILE_DEFAULT_SIZE = "sm"
+# format -> (Pillow format, content type, save options). Every page serves
+# WebP, so that is all that is rendered
+PROFILE_FORMATS = {
+    "webp": ("WEBP", "image/webp", {"quality": 82, "method": 6}),
+}
+# Earlier uploads also stored these; still removed on delete
+PROFILE_LEGACY_FORMATS = ("jpg",)
+
+# Presigned profile picture URLs are reused until this close to expiry
+PROFILE_URL_REFRESH_MARGIN = int(os.getenv("PROFILE_URL_REFRESH_MARGIN", "300"))
+PROFILE_URL_CACHE_SIZE = int(os.getenv("PROFILE_URL_CACHE_SIZE", "10000"))
+
+# Parallel object transfers; botocore's pool must be at least this large
+S3_MAX_WORKERS = int(os.getenv("S3_MAX_WORKERS", "16"))
+S3_MAX_POOL_CONNECTIONS = int(os.getenv("S3_MAX_POOL_CONNECTIONS", str(S3_MAX_WORKERS * 2)))
+S3_UPLOAD_ATTEMPTS = int(os.getenv("S3_UPLOAD_ATTEMPTS", "4"))
+# How many objects a ZIP export requests ahead of the one being written
+S3_ZIP_PREFETCH = int(os.getenv("S3_ZIP_PREFETCH", "4"))
+# Cached export archives built at once in the background
+S3_ARCHIVE_WORKERS = int(os.getenv("S3_ARCHIVE_WORKERS", "2"))
+# Blob hashes known to exist, so repeated saves skip the HEAD request
+S3_KNOWN_BLOBS_SIZE = int(os.getenv("S3_KNOWN_BLOBS_SIZE", "100000"))
+# Unreferenced blobs and migrated legacy objects are kept at least this long
+S3_BLOB_GRACE_SECONDS = int(os.getenv("S3_BLOB_GRACE_SECONDS", str(24 * 3600)))
+
+TRANSIENT_S3_ERRORS = {
+    "SlowDown", "Throttling", "ThrottlingException", "RequestTimeout",
+    "InternalError", "ServiceUnavailable", "500", "502", "503", "504",
+}
+
 # ==============================
 # ENV SAFETY CHECK (FAIL FAST)
 # ==============================
@@ -45,10 +97,19 @@ s3 = boto3.client(
     region_name=AWS_REGION,
     config=Config(
         signature_version="s3v4",
-        s3={"addressing_style": "path"}
+        s3={"addressing_style": "path"},
+        max_pool_connections=S3_MAX_POOL_CONNECTIONS,
+        tcp_keepalive=True,
     ),
 )
 
+# Shared by every request; boto3 clients are thread-safe
+_pool = ThreadPoolExecutor(max_workers=S3_MAX_WORKERS, thread_name_prefix="s3")
+# Archive builds fetch through _pool, so they get their own threads
+_archive_pool = ThreadPoolExecutor(max_workers=S3_ARCHIVE_WORKERS, thread_name_prefix="s3-archive")
+_archive_builds = set()  # archive keys being built
+_archive_builds_lock = threading.Lock()
+
 # ==============================
 # Helpers
 # ==============================
@@ -59,15 +120,51 @@ def allowed_file(filename):
         and filename.rsplit(".", 1)[1].lower() in ALLOWED_EXTENSIONS
     )
 
-def get_profile_pic_url(filename, expires_in=3600):
+# (filename, size, expires_in) -> (url, expires_at); filenames start with the owner's user id
+_profile_urls = OrderedDict()
+_profile_urls_lock = threading.Lock()
+
+
+def _forget_profile_urls(filename=None, user_id=None):
+    with _profile_urls_lock:
+        owner = f"{user_id}_" if user_id is not None else None
+        for cached in list(_profile_urls):
+            if cached[0] == filename or (owner and cached[0].startswith(owner)):
+                del _profile_urls[cached]
+
+
+def _has_variants(filename):
+    # Pipeline uploads are saved as .webp, which raw uploads never were
+    return filename.endswith(".webp")
+
+
+def _profile_key(filename, size=PROFILE_DEFAULT_SIZE, fmt="webp"):
+    if not _has_variants(filename):
+        return f"{S3_PROFILE_FOLDER}{filename}"
+    stem = filename.rsplit(".", 1)[0]
+    return f"{S3_PROFILE_FOLDER}{stem}_{size}.{fmt}"
+
+
+def get_profile_pic_url(filename, expires_in=3600, size=PROFILE_DEFAULT_SIZE):
     if not filename:
         return None
+
+    # Reusing the URL skips SigV4 signing and lets browsers cache the image.
+    # expires_in is part of the key so nobody gets a shorter-lived URL than asked for
+    cache_key = (filename, size, expires_in)
+    now = time.time()
+    with _profile_urls_lock:
+        cached = _profile_urls.get(cache_key)
+        if cached and cached[1] - PROFILE_URL_REFRESH_MARGIN > now:
+            _profile_urls.move_to_end(cache_key)
+            return cached[0]
+
     try:
-        return s3.generate_presigned_url(
+        url = s3.generate_presigned_url(
             "get_object",
             Params={
                 "Bucket": BUCKET_NAME,
-                "Key": f"{S3_PROFILE_FOLDER}{filename}",
+                "Key": _profile_key(filename, size),
             },
             ExpiresIn=expires_in,
         )
@@ -75,9 +172,41 @@ def get_profile_pic_url(filename, expires_in=3600):
         print(f"[S3] Presigned URL error: {e}")
         return None
 
+    with _profile_urls_lock:
+        _profile_urls[cache_key] = (url, now + expires_in)
+        _profile_urls.move_to_end(cache_key)
+        while len(_profile_urls) > PROFILE_URL_CACHE_SIZE:
+            _profile_urls.popitem(last=False)
+    return url
+
 # ==============================
 # Profile Picture Upload
 # ==============================
+def _render_profile_variants(stream):
+    """
+    Square thumbnails of an uploaded image in every size and format.
+    Nothing from the original (EXIF, GPS, ICC profile) is carried over.
+    Returns [(size, fmt, bytes)].
+    """
+    try:
+        with Image.open(stream) as img:
+            # JPEG decoders can skip straight to a reduced scale
+            largest = max(PROFILE_VARIANTS.values())
+            img.draft("RGB", (largest * 2, largest * 2))
+            img = ImageOps.exif_transpose(img).convert("RGBA")
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError) as e:
+        raise ValueError("Invalid image file") from e
+
+    variants = []
+    for size, pixels in PROFILE_VARIANTS.items():
+        thumb = ImageOps.fit(img, (pixels, pixels), Image.Resampling.LANCZOS)
+        for fmt, (pil_format, _, options) in PROFILE_FORMATS.items():
+            buffer = io.BytesIO()
+            thumb.save(buffer, pil_format, **options)
+            variants.append((size, fmt, buffer.getvalue()))
+    return variants
+
+
 def upload_profile_picture(file, user_id):
     if not file or not file.filename:
         raise ValueError("No file uploaded")
@@ -86,21 +215,26 @@ def upload_profile_picture(file, user_id):
         raise ValueError("Invalid file type")
 
     file.stream.seek(0)
+    variants = _render_profile_variants(file.stream)
 
-    ext = file.filename.rsplit(".", 1)[1].lower()
     filename = secure_filename(
-        f"{user_id}_{datetime.utcnow().strftime('%Y%m%d%H%M%S')}.{ext}"
+        f"{user_id}_{datetime.utcnow().strftime('%Y%m%d%H%M%S')}.webp"
     )
 
-    try:
-        s3.upload_fileobj(
-            file,
-            BUCKET_NAME,
-            f"{S3_PROFILE_FOLDER}{filename}",
-            ExtraArgs={
-                "ContentType": file.mimetype or "image/png"
-            },
+    def put(variant):
+        size, fmt, body = variant
+        s3.put_object(
+            Bucket=BUCKET_NAME,
+            Key=_profile_key(filename, size, fmt),
+            Body=body,
+            ContentType=PROFILE_FORMATS[fmt][1],
+            # Every upload gets a new filename, so variants never change
+            CacheControl="public, max-age=31536000, immutable",
         )
+
+    try:
+        list(_pool.map(put, variants))
+        _forget_profile_urls(user_id=user_id)
         #print(f"[MinIO] Uploaded profile picture: {filename}")
         return filename
 
@@ -111,16 +245,24 @@ def upload_profile_picture(file, user_id):
 def delete_profile_picture(filename):
     if not filename:
         return
+    _forget_profile_urls(filename=filename)
     try:
-        s3.delete_object(
-            Bucket=BUCKET_NAME,
-            Key=f"{S3_PROFILE_FOLDER}{filename}",
-        )
+        if _has_variants(filename):
+            _delete_keys([
+                _profile_key(filename, size, fmt)
+                for size in PROFILE_VARIANTS
+                for fmt in (*PROFILE_FORMATS, *PROFILE_LEGACY_FORMATS)
+            ])
+        else:
+            s3.delete_object(
+                Bucket=BUCKET_NAME,
+                Key=f"{S3_PROFILE_FOLDER}{filename}",
+            )
     except Exception as e:
         print(f"[S3] Delete error: {e}")
 
 # ==============================
-# Project Files
+# Project Storage
 # ==============================
 def _project_prefix(user_id, project_id):
     if not user_id or not project_id:
@@ -128,82 +270,703 @@ def _project_prefix(user_id, project_id):
     return f"{S3_PROJECTS_FOLDER}{user_id}/{project_id}/"
 
 
-def upload_project_file(user_id, project_id, file_path, content):
-    if not file_path or content is None:
-        raise ValueError("Invalid project file data")
+def _now():
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _iter_objects(prefix):
+    """Every object under `prefix`, across as many list pages as needed."""
+    paginator = s3.get_paginator("list_objects_v2")
+    for page in paginator.paginate(Bucket=BUCKET_NAME, Prefix=prefix):
+        yield from page.get("Contents", [])
+
+
+def _iter_project_objects(prefix):
+    """(relative_path, obj) for the user-visible files under a project prefix."""
+    for obj in _iter_objects(prefix):
+        relative_path = obj["Key"][len(prefix):]
+        if relative_path and not relative_path.startswith(S3_PROJECT_INTERNAL):
+            yield relative_path, obj
+
+
+def _read_bytes(key):
+    return s3.get_object(Bucket=BUCKET_NAME, Key=key)["Body"].read()
+
+
+def _read_object(key):
+    return _read_bytes(key).decode("utf-8")
+
 
-    key = f"{_project_prefix(user_id, project_id)}{file_path}"
+def _delete_keys(keys):
+    """delete_objects takes at most 1000 keys per call."""
+    for start in range(0, len(keys), 1000):
+        batch = keys[start:start + 1000]
+        result = s3.delete_objects(
+            Bucket=BUCKET_NAME,
+            Delete={"Objects": [{"Key": key} for key in batch], "Quiet": True},
+        )
+        for error in result.get("Errors", []):
+            print(f"[S3] Delete error for {error.get('Key')}: {error.get('Message')}")
+
+# ==============================
+# Content-addressed blobs
+# ==============================
+# File contents live once under blobs/sha256/, shared by every project;
+# a project is just its manifest mapping paths to blob hashes. Blobs no
+# manifest references are removed by sweep_storage() after a grace period;
+# reusing a blob refreshes its LastModified so a sweep can't race the reuse.
+# digest -> LastModified (epoch seconds) as last seen or set by us
+_known_blobs = OrderedDict()
+_known_blobs_lock = threading.Lock()
+
+
+def _blob_key(digest):
+    return f"{S3_BLOBS_FOLDER}{digest[:2]}/{digest}"
 
-    s3.put_object(
+
+def _remember_blob(digest, modified):
+    with _known_blobs_lock:
+        _known_blobs[digest] = modified
+        _known_blobs.move_to_end(digest)
+        while len(_known_blobs) > S3_KNOWN_BLOBS_SIZE:
+            _known_blobs.popitem(last=False)
+
+
+def _touch_blob(digest):
+    """Self-copy: bumps LastModified without moving the bytes through us."""
+    key = _blob_key(digest)
+    s3.copy_object(
         Bucket=BUCKET_NAME,
         Key=key,
-        Body=content.encode("utf-8"),
+        CopySource={"Bucket": BUCKET_NAME, "Key": key},
+        MetadataDirective="REPLACE",
         ContentType="text/plain",
     )
 
 
+def _blob_exists(digest):
+    """True if the blob is stored and safe from the next sweep for a while."""
+    now = time.time()
+    with _known_blobs_lock:
+        modified = _known_blobs.get(digest)
+    if modified is not None and now - modified < S3_BLOB_GRACE_SECONDS / 2:
+        return True
+
+    try:
+        head = s3.head_object(Bucket=BUCKET_NAME, Key=_blob_key(digest))
+    except ClientError as e:
+        if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+            return False
+        raise
+
+    modified = head["LastModified"].timestamp()
+    if now - modified >= S3_BLOB_GRACE_SECONDS / 2:
+        _touch_blob(digest)
+        modified = now
+    _remember_blob(digest, modified)
+    return True
+
+
+def _store_blob(body):
+    """Upload `body` unless an identical blob is already stored. Returns its manifest entry."""
+    digest = hashlib.sha256(body).hexdigest()
+    stored = not _blob_exists(digest)
+    if stored:
+        _put_with_retry(_blob_key(digest), body)
+        _remember_blob(digest, time.time())
+    return {"hash": digest, "size": len(body), "last_modified": _now()}, stored
+
+# ==============================
+# Project manifests
+# ==============================
+class _ManifestConflict(Exception):
+    """Another worker wrote the manifest after we read it."""
+
+
+def _read_manifest(user_id, project_id):
+    """(manifest, etag), or (None, None) when the project has no manifest."""
+    try:
+        obj = s3.get_object(
+            Bucket=BUCKET_NAME,
+            Key=f"{_project_prefix(user_id, project_id)}{MANIFEST_FILE}",
+        )
+    except s3.exceptions.NoSuchKey:
+        return None, None
+    return json.loads(obj["Body"].read().decode("utf-8")), obj["ETag"]
+
+
+def _write_manifest(user_id, project_id, manifest, etag):
+    """
+    Conditional put: only succeeds if the manifest is still the one read
+    (IfMatch), or still absent for a new project (IfNoneMatch).
+    """
+    manifest["version"] = MANIFEST_VERSION
+    manifest["written_at"] = _now()
+    condition = {"IfMatch": etag} if etag else {"IfNoneMatch": "*"}
+    try:
+        _put_with_retry(
+            f"{_project_prefix(user_id, project_id)}{MANIFEST_FILE}",
+            json.dumps(manifest, indent=2).encode("utf-8"),
+            content_type="application/json",
+            **condition,
+        )
+    except ClientError as e:
+        if e.response.get("Error", {}).get("Code") in MANIFEST_CONFLICT_CODES:
+            raise _ManifestConflict() from e
+        raise
+    invalidate_project_archives(user_id, project_id)
+
+
+def _legacy_view(user_id, project_id, old_manifest):
+    """
+    Read-only manifest of a project still stored one object per file.
+    Entries point at those objects, with the S3 ETag standing in for the hash.
+    """
+    prefix = _project_prefix(user_id, project_id)
+    files = {
+        path: {
+            "key": obj["Key"],
+            "hash": obj["ETag"].strip('"'),
+            "size": obj["Size"],
+            "last_modified": obj["LastModified"].isoformat(),
+        }
+        for path, obj in _iter_project_objects(prefix)
+    }
+    return {"metadata": (old_manifest or {}).get("metadata", {}), "files": files}
+
+
+def _entry_key(entry):
+    return entry.get("key") or _blob_key(entry["hash"])
+
+
+def _migrated(user_id, project_id, old_manifest):
+    """
+    A legacy project's files copied into blobs, as an unwritten manifest.
+    The original objects are left alone; sweep_storage() removes them later.
+    """
+    view = _legacy_view(user_id, project_id, old_manifest)
+
+    def migrate(item):
+        path, entry = item
+        blob, _ = _store_blob(_read_bytes(entry["key"]))
+        blob["last_modified"] = entry["last_modified"]
+        return path, blob
+
+    manifest = {
+        "complete": True,
+        "metadata": view["metadata"],
+        "files": dict(_pool.map(migrate, view["files"].items())),
+    }
+    if view["files"]:
+        manifest["migrated_at"] = _now()
+    return manifest
+
+
+def _load_manifest(user_id, project_id):
+    """
+    The project's manifest for reading. Never writes: a project that hasn't
+    been migrated yet is served from its old layout.
+    """
+    manifest, _ = _read_manifest(user_id, project_id)
+    if manifest and manifest.get("version") == MANIFEST_VERSION:
+        return manifest
+    return _legacy_view(user_id, project_id, manifest)
+
+
+def _update_manifest(user_id, project_id, change):
+    """
+    Optimistic read-modify-write. `change(manifest)` edits the manifest in
+    place and returns (result, changed). If another worker writes in
+    between, the manifest is re-read and the change applied again, so
+    concurrent saves never drop each other's files. Legacy projects are
+    migrated here, on their first write.
+    """
+    for attempt in range(1, MANIFEST_WRITE_ATTEMPTS + 1):
+        manifest, etag = _read_manifest(user_id, project_id)
+        migrating = not manifest or manifest.get("version") != MANIFEST_VERSION
+        if migrating:
+            manifest = _migrated(user_id, project_id, manifest)
+
+        result, changed = change(manifest)
+        if not changed and not (migrating and manifest["files"]):
+            return result
+
+        try:
+            _write_manifest(user_id, project_id, manifest, etag)
+            return result
+        except _ManifestConflict:
+            delay = random.uniform(0.05, 0.2) * attempt
+            print(f"[S3] Manifest conflict on {project_id}, retry {attempt} in {delay:.2f}s")
+            time.sleep(delay)
+
+    raise RuntimeError(f"Project {project_id} is being modified concurrently, try again")
+
+
+def migrate_project(user_id, project_id):
+    """Move a legacy project into blobs now instead of on its first write. Returns its file count."""
+    return _update_manifest(user_id, project_id, lambda manifest: (len(manifest["files"]), False))
+
+
+def iter_projects():
+    """(user_id, project_id) for every project in the bucket."""
+    paginator = s3.get_paginator("list_objects_v2")
+    for users in paginator.paginate(Bucket=BUCKET_NAME, Prefix=S3_PROJECTS_FOLDER, Delimiter="/"):
+        for user in users.get("CommonPrefixes", []):
+            user_prefix = user["Prefix"]
+            for projects in paginator.paginate(Bucket=BUCKET_NAME, Prefix=user_prefix, Delimiter="/"):
+                for project in projects.get("CommonPrefixes", []):
+                    yield (
+                        user_prefix[len(S3_PROJECTS_FOLDER):-1],
+                        project["Prefix"][len(user_prefix):-1],
+                    )
+
+
+def sweep_storage(grace_seconds=S3_BLOB_GRACE_SECONDS):
+    """
+    Mark and sweep. Collects every blob hash referenced by a project
+    manifest, then deletes blobs that no manifest references and that
+    haven't been written or reused for `grace_seconds`. Also removes the
+    per-file objects of projects migrated more than `grace_seconds` ago.
+    Meant to run from a scheduled job (sweep_storage.py), not a request.
+    """
+    started = time.time()
+    cutoff = started - grace_seconds
+    referenced = set()
+    legacy_keys = []
+
+    for user_id, project_id in iter_projects():
+        manifest, _ = _read_manifest(user_id, project_id)
+        if not manifest or manifest.get("version") != MANIFEST_VERSION:
+            continue
+        referenced.update(entry["hash"] for entry in manifest["files"].values())
+
+        migrated_at = manifest.get("migrated_at")
+        if migrated_at and datetime.fromisoformat(migrated_at).timestamp() < cutoff:
+            prefix = _project_prefix(user_id, project_id)
+            legacy_keys.extend(obj["Key"] for _, obj in _iter_project_objects(prefix))
+
+    orphans = [
+        obj["Key"] for obj in _iter_objects(S3_BLOBS_FOLDER)
+        if obj["Key"].rsplit("/", 1)[-1] not in referenced
+        and obj["LastModified"].timestamp() < cutoff
+    ]
+
+    _delete_keys(orphans)
+    _delete_keys(legacy_keys)
+    with _known_blobs_lock:
+        for key in orphans:
+            _known_blobs.pop(key.rsplit("/", 1)[-1], None)
+
+    return {
+        "referenced": len(referenced),
+        "deleted_blobs": len(orphans),
+        "deleted_legacy_objects": len(legacy_keys),
+        "seconds": round(time.time() - started, 3),
+    }
+
+
+def get_project_manifest(user_id, project_id):
+    return _read_manifest(user_id, project_id)[0]
+
+# ==============================
+# Project Files
+# ==============================
+def upload_project_file(user_id, project_id, file_path, content):
+    if not file_path or content is None:
+        raise ValueError("Invalid project file data")
+
+    entry, _ = _store_blob(content.encode("utf-8"))
+
+    def change(manifest):
+        manifest["files"][file_path] = entry
+        return None, True
+
+    _update_manifest(user_id, project_id, change)
+
+
 def delete_project_file(user_id, project_id, file_path):
     if not file_path:
         return
 
-    key = f"{_project_prefix(user_id, project_id)}{file_path}"
-    s3.delete_object(Bucket=BUCKET_NAME, Key=key)
+    def change(manifest):
+        return None, manifest["files"].pop(file_path, None) is not None
+
+    _update_manifest(user_id, project_id, change)
+
+
+def copy_project_file(user_id, project_id, source_path, dest_path):
+    """Returns False if the source file doesn't exist. Only the manifest changes."""
+    if not source_path or not dest_path:
+        raise ValueError("source_path and dest_path required")
+
+    def change(manifest):
+        entry = manifest["files"].get(source_path)
+        if entry is None:
+            return False, False
+        manifest["files"][dest_path] = dict(entry, last_modified=_now())
+        return True, True
+
+    return _update_manifest(user_id, project_id, change)
+
+
+def move_project_file(user_id, project_id, source_path, dest_path):
+    if source_path == dest_path:
+        return True
+
+    def change(manifest):
+        entry = manifest["files"].pop(source_path, None)
+        if entry is None:
+            return False, False
+        manifest["files"][dest_path] = entry
+        return True, True
+
+    return _update_manifest(user_id, project_id, change)
+
+
+def move_project_directory(user_id, project_id, source_dir, dest_dir):
+    """Rename a folder in one manifest write. Returns the number of files moved."""
+    source_dir = source_dir.strip("/") + "/"
+    dest_dir = dest_dir.strip("/") + "/"
+    if source_dir == dest_dir:
+        return 0
+    if dest_dir.startswith(source_dir):
+        raise ValueError("Cannot move a folder into itself")
+
+    def change(manifest):
+        files = manifest["files"]
+        moved = [path for path in files if path.startswith(source_dir)]
+        # Build the renamed mapping first, then apply it in one go
+        renamed = {f"{dest_dir}{path[len(source_dir):]}": files[path] for path in moved}
+        for path in moved:
+            del files[path]
+        files.update(renamed)
+        return len(moved), bool(moved)
+
+    return _update_manifest(user_id, project_id, change)
 
 
 def get_project_file_content(user_id, project_id, file_path):
     if not file_path:
         return None
 
+    entry = _load_manifest(user_id, project_id)["files"].get(file_path)
+    if entry is None:
+        return None
     try:
-        obj = s3.get_object(
-            Bucket=BUCKET_NAME,
-            Key=f"{_project_prefix(user_id, project_id)}{file_path}"
-        )
-        return obj["Body"].read().decode("utf-8")
+        return _read_object(_entry_key(entry))
+    except s3.exceptions.NoSuchKey:
+        print(f"[S3] Missing blob for {file_path}: {entry['hash']}")
+        return None
+
+
+def list_project_metadata(user_id, project_id):
+    """
+    Project tree without contents: { "path": {"size", "etag", "last_modified"} }.
+    One manifest read, no file downloads.
+    """
+    return {
+        path: {
+            "size": entry["size"],
+            "etag": entry["hash"],
+            "last_modified": entry["last_modified"]
+        }
+        for path, entry in _load_manifest(user_id, project_id)["files"].items()
+    }
+
+
+def get_project_file(user_id, project_id, file_path, if_none_match=None):
+    """
+    One file with its validators. Returns None if it doesn't exist, or
+    {"not_modified": True, ...} when `if_none_match` still matches, in
+    which case the body is never transferred.
+    """
+    if not file_path:
+        return None
+
+    entry = _load_manifest(user_id, project_id)["files"].get(file_path)
+    if entry is None:
+        return None
+
+    # The ETag is the content hash, so no S3 request is needed to compare
+    if if_none_match == entry["hash"]:
+        return {"not_modified": True, "etag": entry["hash"]}
+
+    try:
+        content = _read_object(_entry_key(entry))
     except s3.exceptions.NoSuchKey:
+        print(f"[S3] Missing blob for {file_path}: {entry['hash']}")
         return None
 
+    return {
+        "not_modified": False,
+        "content": content,
+        "etag": entry["hash"],
+        "last_modified": entry["last_modified"]
+    }
+
 
 def list_project_files(user_id, project_id):
-    prefix = _project_prefix(user_id, project_id)
+    entries = _load_manifest(user_id, project_id)["files"]
+    paths = list(entries)
+    contents = _pool.map(_read_object, [_entry_key(entries[path]) for path in paths])
+
     files = {}
+    for path, content in zip(paths, contents):
+        files[path] = {
+            "content": content,
+            "last_modified": entries[path]["last_modified"]
+        }
 
-    result = s3.list_objects_v2(
-        Bucket=BUCKET_NAME,
-        Prefix=prefix
-    )
+    return files
 
-    for obj in result.get("Contents", []):
-        key = obj["Key"]
-        relative_path = key.replace(prefix, "")
+class _ZipSink:
+    """Write-only buffer that ZipFile writes into and the response drains."""
 
-        if not relative_path:
-            continue
+    def __init__(self):
+        self._chunks = []
 
-        file_obj = s3.get_object(
-            Bucket=BUCKET_NAME,
-            Key=key
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def stream_project_zip(user_id, project_id, prefetch=S3_ZIP_PREFETCH, chunk_size=64 * 1024):
+    """
+    Yield a ZIP of the project as it is built. Up to `prefetch` objects are
+    requested ahead in parallel, but bodies are read a chunk at a time, so
+    memory stays at a few buffers whatever the project size.
+    """
+    objects = iter(list(_load_manifest(user_id, project_id)["files"].items()))
+    pending = deque()
+
+    def fetch(key):
+        return s3.get_object(Bucket=BUCKET_NAME, Key=key)["Body"]
+
+    def fill():
+        while len(pending) < prefetch:
+            item = next(objects, None)
+            if item is None:
+                return
+            path, entry = item
+            pending.append((path, entry, _pool.submit(fetch, _entry_key(entry))))
+
+    sink = _ZipSink()
+    try:
+        with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+            fill()
+            while pending:
+                path, entry, future = pending.popleft()
+                fill()
+                try:
+                    body = future.result()
+                except s3.exceptions.NoSuchKey:
+                    print(f"[S3] Missing blob for {path}: {entry['hash']}")
+                    continue
+
+                modified = datetime.fromisoformat(entry["last_modified"])
+                info = zipfile.ZipInfo(path, date_time=modified.timetuple()[:6])
+                info.compress_type = zipfile.ZIP_DEFLATED
+                try:
+                    with zf.open(info, "w", force_zip64=entry["size"] >= zipfile.ZIP64_LIMIT) as dest:
+                        for chunk in body.iter_chunks(chunk_size):
+                            dest.write(chunk)
+                            data = sink.drain()
+                            if data:
+                                yield data
+                finally:
+                    body.close()
+
+                data = sink.drain()
+                if data:
+                    yield data
+
+        # Central directory, written when the ZipFile closes
+        data = sink.drain()
+        if data:
+            yield data
+    finally:
+        # Client went away mid-download: release prefetched connections
+        for _, _, future in pending:
+            future.cancel()
+            if future.done() and not future.cancelled() and not future.exception():
+                future.result().close()
+
+
+class _StreamReader:
+    """File-like read() over a generator of bytes, for upload_fileobj."""
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._buffer = bytearray()
+
+    def read(self, size=-1):
+        while size < 0 or len(self._buffer) < size:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                break
+            self._buffer += chunk
+        if size < 0:
+            size = len(self._buffer)
+        data = bytes(self._buffer[:size])
+        del self._buffer[:size]
+        return data
+
+
+def project_manifest_hash(user_id, project_id):
+    """Changes whenever any file is added, removed or rewritten."""
+    files = list_project_metadata(user_id, project_id)
+    digest = hashlib.sha256()
+    for path in sorted(files):
+        digest.update(f"{path}\0{files[path]['etag']}\n".encode("utf-8"))
+    return digest.hexdigest(), len(files)
+
+
+def invalidate_project_archives(user_id, project_id):
+    prefix = f"{_project_prefix(user_id, project_id)}{ARCHIVES_FOLDER}"
+    try:
+        _delete_keys([obj["Key"] for obj in _iter_objects(prefix)])
+    except Exception as e:
+        # Stale archives are unreachable anyway: their hash no longer matches
+        print(f"[S3] Archive cleanup failed: {e}")
+
+
+def _build_archive(user_id, project_id, key):
+    try:
+        # Streamed into a multipart upload, never fully in memory
+        s3.upload_fileobj(
+            _StreamReader(stream_project_zip(user_id, project_id)),
+            BUCKET_NAME,
+            key,
+            ExtraArgs={"ContentType": "application/zip"},
         )
+    except Exception as e:
+        print(f"[S3] Archive build failed for {key}: {e}")
+    finally:
+        with _archive_builds_lock:
+            _archive_builds.discard(key)
 
-        files[relative_path] = {
-            "content": file_obj["Body"].read().decode("utf-8"),
-            "last_modified": obj["LastModified"].isoformat()
-        }
 
-    return files
+def get_project_archive_url(user_id, project_id, expires_in=3600):
+    """
+    Presigned URL of the cached ZIP for the project's current state, or
+    None if the project is empty or no archive is cached yet. On a miss
+    the archive is built in the background for the next export, so the
+    caller should stream the ZIP itself in the meantime.
+    """
+    manifest_hash, count = project_manifest_hash(user_id, project_id)
+    if not count:
+        return None
+
+    key = f"{_project_prefix(user_id, project_id)}{ARCHIVES_FOLDER}{manifest_hash}.zip"
+    try:
+        s3.head_object(Bucket=BUCKET_NAME, Key=key)
+    except ClientError as e:
+        if e.response.get("Error", {}).get("Code") not in ("404", "NoSuchKey", "NotFound"):
+            raise
+        with _archive_builds_lock:
+            building = key in _archive_builds
+            _archive_builds.add(key)
+        if not building:
+            _archive_pool.submit(_build_archive, user_id, project_id, key)
+        return None
+
+    return s3.generate_presigned_url(
+        "get_object",
+        Params={
+            "Bucket": BUCKET_NAME,
+            "Key": key,
+            "ResponseContentDisposition": f'attachment; filename="{secure_filename(str(project_id))}.zip"',
+        },
+        ExpiresIn=expires_in,
+    )
+
+
+def _is_transient(error):
+    if isinstance(error, BotoCoreError):
+        return True
+    if isinstance(error, ClientError):
+        return error.response.get("Error", {}).get("Code") in TRANSIENT_S3_ERRORS
+    return False
+
+
+def _put_with_retry(key, body, content_type="text/plain", attempts=S3_UPLOAD_ATTEMPTS, **extra):
+    for attempt in range(1, attempts + 1):
+        try:
+            return s3.put_object(
+                Bucket=BUCKET_NAME,
+                Key=key,
+                Body=body,
+                ContentType=content_type,
+                **extra,
+            )
+        except Exception as e:
+            if attempt == attempts or not _is_transient(e):
+                raise
+            delay = min(8.0, 0.25 * 2 ** (attempt - 1)) * random.uniform(0.5, 1.0)
+            print(f"[S3] Put {key} failed ({e}), retry {attempt}/{attempts - 1} in {delay:.2f}s")
+            time.sleep(delay)
+
+
+class ProjectUploadError(RuntimeError):
+    """Some files of a batch upload failed; no manifest was written."""
+
+    def __init__(self, failed):
+        self.failed = failed
+        super().__init__(f"Failed to upload {len(failed)} file(s): {', '.join(sorted(failed))}")
+
+
+def upload_project_files(user_id, project_id, files, metadata=None):
+    """
+    Store many files in parallel, skipping contents already in the blob
+    store and retrying each put with backoff, then point the manifest at
+    them in one final write. If any file fails the manifest is left as it
+    was, so a project is never seen half-written.
+    files = { "path": "content" }
+    """
+    paths = [path for path, content in files.items() if path and content is not None]
+    futures = {path: _pool.submit(_store_blob, files[path].encode("utf-8")) for path in paths}
+
+    uploaded = {}
+    failed = {}
+    stored = 0
+    for path, future in futures.items():
+        try:
+            uploaded[path], was_stored = future.result()
+            stored += was_stored
+        except Exception as e:
+            print(f"[S3] Upload failed for {path}: {e}")
+            failed[path] = str(e)
+
+    if failed:
+        raise ProjectUploadError(failed)
+
+    print(f"[S3] Saved {len(uploaded)} file(s), {len(uploaded) - stored} already stored")
+
+    def change(manifest):
+        manifest["files"].update(uploaded)
+        manifest["complete"] = True
+        if metadata:
+            manifest["metadata"] = metadata
+        return manifest, True
+
+    return _update_manifest(user_id, project_id, change)
+
 
 def save_full_project(user_id, project_id, files, metadata=None):
     """
     Save full project to S3
     files = { "path": "content" }
     """
-    for path, content in files.items():
-        upload_project_file(user_id, project_id, path, content)
-
+    files = dict(files)
     if metadata:
-        upload_project_file(
-            user_id,
-            project_id,
-            "metadata.json",
-            json.dumps(metadata, indent=2)
-        )
+        files["metadata.json"] = json.dumps(metadata, indent=2)
+
+    return upload_project_files(user_id, project_id, files, metadata)
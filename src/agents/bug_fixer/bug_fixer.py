@@ -5,7 +5,7 @@ from pathlib import Path
 from typing import Any, Dict, Optional
 
 from jinja2 import Environment, BaseLoader
-from src.llm import LLM
+from src.llm import LLM, RetryPolicy
 
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
@@ -19,9 +19,9 @@ class BugFixer:
 
     REQUIRED_KEYS = {"analysis", "solution", "fixed_code"}
 
-    def __init__(self, base_model: str, api_key: str):
+    def __init__(self, base_model: str, api_key: str, retry_policy: Optional[RetryPolicy] = None):
         self.llm = LLM(base_model, api_key, agent_name="bug_fixer")
-        self.max_retries = 3
+        self.retry_policy = retry_policy or RetryPolicy()
 
         self.code_block_pattern = re.compile(
             r"```(?:json|python|[\w]+)?\n(.*?)```",
@@ -69,18 +69,8 @@ class BugFixer:
         return None
 
     def _call_llm(self, prompt: str) -> str:
-        """Centralized LLM call with retries."""
-        for attempt in range(1, self.max_retries + 1):
-            try:
-                return self.llm.inference(prompt)
-            except Exception as exc:
-                logger.warning(
-                    "LLM call failed (attempt %s/%s): %s",
-                    attempt,
-                    self.max_retries,
-                    exc
-                )
-        raise RuntimeError("LLM failed after maximum retries")
+        """Centralized LLM call; transient errors are retried by the request policy."""
+        return self.retry_policy.call("BugFixer LLM", self.llm.inference, prompt)
 
     # -------------------------
     # Public methods
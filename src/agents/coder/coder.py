@@ -1,11 +1,13 @@
 import re
 import json
 import logging
+import time
 from pathlib import Path
-from typing import List, Dict, Optional
+from typing import Generator, List, Dict, Optional, Tuple
 
 from jinja2 import Environment, BaseLoader
-from src.llm import LLM
+from src.agents.coder.context_packer import pack_context
+from src.llm import DEADLINE_RESERVE, LLM, RetryPolicy
 
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
@@ -17,8 +19,9 @@ class Coder:
     Handles malformed LLM output gracefully and validates requested pages.
     """
 
-    def __init__(self, base_model: str, api_key: str):
+    def __init__(self, base_model: str, api_key: str, retry_policy: Optional[RetryPolicy] = None):
         self.llm = LLM(base_model, api_key, agent_name="coder")
+        self.retry_policy = retry_policy or RetryPolicy()
 
         self.code_block_pattern = re.compile(
             r"```(?:\w+)?\n(.*?)```",
@@ -32,6 +35,7 @@ class Coder:
 
         self.prompt_template = self._load_prompt()
         self.max_retries = 3
+        self.context_report = {}
 
     # -------------------------
     # Internal helpers
@@ -44,22 +48,30 @@ class Coder:
         return path.read_text(encoding="utf-8").strip()
 
     def _call_llm(self, prompt: str) -> str:
-        for attempt in range(1, self.max_retries + 1):
-            try:
-                return self.llm.inference(prompt)
-            except Exception as exc:
-                logger.warning(
-                    "LLM failed (attempt %s/%s): %s",
-                    attempt,
-                    self.max_retries,
-                    exc
-                )
-        raise RuntimeError("LLM failed after max retries")
+        return self.retry_policy.call("Coder LLM", self.llm.inference, prompt)
 
     # -------------------------
     # Rendering
     # -------------------------
 
+    def pack_search_results(self, step_by_step_plan, user_prompt: str, search_results: Dict) -> Dict:
+        """Trim search results to the chunks most relevant to the plan and request."""
+        if not search_results:
+            self.context_report = {}
+            return search_results
+
+        query = f"{user_prompt}\n{json.dumps(step_by_step_plan, default=str)}"
+        packed, self.context_report = pack_context(search_results, query)
+        logger.info(
+            "Search context: %s -> %s tokens (%s saved, %s/%s chunks)",
+            self.context_report["tokens_before"],
+            self.context_report["tokens_after"],
+            self.context_report["tokens_saved"],
+            self.context_report["chunks_kept"],
+            self.context_report["chunks_total"],
+        )
+        return packed
+
     def render(self, step_by_step_plan: str, user_prompt: str, search_results: Dict) -> str:
         env = Environment(loader=BaseLoader())
         template = env.from_string(self.prompt_template)
@@ -148,8 +160,10 @@ class Coder:
         search_results: Dict
     ) -> List[Dict[str, str]]:
 
+        search_results = self.pack_search_results(step_by_step_plan, user_prompt, search_results)
         for attempt in range(1, self.max_retries + 1):
             logger.info("Coder attempt %s/%s", attempt, self.max_retries)
+            self.retry_policy.check("Coder")
 
             prompt = self.render(step_by_step_plan, user_prompt, search_results)
             response = self._call_llm(prompt)
@@ -170,6 +184,80 @@ class Coder:
         logger.warning("Returning partial files after max retries")
         return files
 
+    def stream(
+        self,
+        step_by_step_plan: str,
+        user_prompt: str,
+        search_results: Dict
+    ) -> Generator[Tuple[int, str], None, List[Dict[str, str]]]:
+        """
+        Same as execute(), but yields (attempt, chunk) pairs while code is
+        generated; attempt goes up whenever the stream restarts. The parsed
+        file list is the generator's return value. Transient provider errors
+        are retried under the request's RetryPolicy without using up one of
+        the max_retries validation attempts. The coder stops DEADLINE_RESERVE
+        seconds before the request deadline so project creation and saving
+        still have time to run; if that point or the retries are reached,
+        the last non-empty parse is returned.
+        """
+        search_results = self.pack_search_results(step_by_step_plan, user_prompt, search_results)
+        prompt = self.render(step_by_step_plan, user_prompt, search_results)
+        files = []
+        streams = 0   # stream runs, so the client can drop a restarted preview
+        failures = 0  # transient errors since the last complete response
+        attempt = 0   # complete responses checked
+        while attempt < self.max_retries:
+            if files and self.retry_policy.expired(DEADLINE_RESERVE):
+                logger.warning("Request deadline reached, returning partial files")
+                return files
+            self.retry_policy.check("Coder", DEADLINE_RESERVE)
+            logger.info("Coder attempt %s/%s", attempt + 1, self.max_retries)
+
+            streams += 1
+            parts = []
+            out_of_time = False
+            started = time.monotonic()
+            try:
+                for chunk in self.llm.stream(prompt):
+                    parts.append(chunk)
+                    yield streams, chunk
+                    if self.retry_policy.expired(DEADLINE_RESERVE):
+                        out_of_time = True
+                        break
+            except Exception as exc:
+                failures += 1
+                self.retry_policy.record("Coder LLM stream", failures, started, exc)
+                delay = self.retry_policy.should_retry(exc, failures, DEADLINE_RESERVE)
+                if delay is None:
+                    if files:
+                        logger.warning("Coder LLM failed, returning partial files")
+                        return files
+                    raise
+                time.sleep(delay)
+                continue
+            self.retry_policy.record("Coder LLM stream", failures + 1, started)
+            failures = 0
+            attempt += 1
+
+            parsed = self.parse_response("".join(parts))
+            if out_of_time:
+                # A complete earlier response beats one cut off mid-file
+                logger.warning("Request deadline reached mid-stream, returning partial files")
+                return files or parsed
+            if not parsed:
+                logger.warning("No files parsed from LLM output, retrying...")
+                continue
+            files = parsed
+
+            if self._verify_all_pages_generated(files, user_prompt):
+                logger.info("All requested pages generated successfully")
+                return files
+            else:
+                logger.warning("Some requested pages are missing, retrying...")
+
+        logger.warning("Returning partial files after max retries")
+        return files
+
     # -------------------------
     # Page verification
     # -------------------------
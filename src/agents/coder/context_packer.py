@@ -0,0 +1,118 @@
+# src/agents/coder/context_packer.py
+import math
+import os
+import re
+from collections import Counter
+
+from src.tokens import count_tokens
+
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CODER_CONTEXT_TOKENS", "6000"))
+CHUNK_WORDS = int(os.getenv("CODER_CONTEXT_CHUNK_WORDS", "120"))
+
+# BM25 parameters
+K1 = 1.5
+B = 0.75
+
+_term = re.compile(r"[a-z0-9_]+")
+
+
+def _terms(text: str) -> list[str]:
+    return [t for t in _term.findall(text.lower()) if len(t) > 1]
+
+
+def chunk_text(text: str, chunk_words: int = CHUNK_WORDS) -> list[str]:
+    """
+    Split page text into pieces of at most chunk_words words. A block that
+    doesn't fit in the current piece starts a new one; only blocks longer
+    than chunk_words are split.
+    """
+    chunks = []
+    current = []
+    for block in text.splitlines():
+        words = block.split()
+        if current and len(current) + len(words) > chunk_words:
+            chunks.append(" ".join(current))
+            current = []
+        while words:
+            room = chunk_words - len(current)
+            current.extend(words[:room])
+            words = words[room:]
+            if len(current) >= chunk_words:
+                chunks.append(" ".join(current))
+                current = []
+    if current:
+        chunks.append(" ".join(current))
+    return chunks
+
+
+def bm25_scores(query: str, docs: list[str]) -> list[float]:
+    query_terms = set(_terms(query))
+    doc_terms = [Counter(_terms(doc)) for doc in docs]
+    if not query_terms or not docs:
+        return [0.0] * len(docs)
+
+    avg_len = sum(sum(c.values()) for c in doc_terms) / len(docs) or 1.0
+    df = Counter(term for c in doc_terms for term in query_terms if term in c)
+
+    scores = []
+    for counts in doc_terms:
+        length = sum(counts.values())
+        score = 0.0
+        for term in query_terms:
+            tf = counts.get(term)
+            if not tf:
+                continue
+            idf = math.log(1 + (len(docs) - df[term] + 0.5) / (df[term] + 0.5))
+            score += idf * tf * (K1 + 1) / (tf + K1 * (1 - B + B * length / avg_len))
+        scores.append(score)
+    return scores
+
+
+def pack_context(search_results: dict, query: str, budget: int = CONTEXT_TOKEN_BUDGET) -> tuple[dict, dict]:
+    """
+    Keep the page chunks most relevant to `query` until `budget` tokens are
+    used. Returns the packed results in the same {query: {"link", "content"}}
+    shape, plus a report of tokens before/after.
+    """
+    chunks = []  # (search query, position, text)
+    tokens_before = 0
+    for search_query, data in search_results.items():
+        content = (data or {}).get("content") or ""
+        tokens_before += count_tokens(content) if content else 0
+        for position, chunk in enumerate(chunk_text(content)):
+            chunks.append((search_query, position, chunk))
+
+    scores = bm25_scores(query, [c[2] for c in chunks])
+    ranked = sorted(range(len(chunks)), key=lambda i: (-scores[i], chunks[i][1]))
+
+    kept = []
+    used = 0
+    for i in ranked:
+        tokens = count_tokens(chunks[i][2])
+        if used + tokens > budget:
+            continue
+        kept.append(i)
+        used += tokens
+
+    # Chunks go back into their page's reading order
+    by_query: dict[str, list[tuple[int, str]]] = {}
+    for i in kept:
+        search_query, position, chunk = chunks[i]
+        by_query.setdefault(search_query, []).append((position, chunk))
+
+    packed = {}
+    for search_query, data in search_results.items():
+        parts = sorted(by_query.get(search_query, []))
+        packed[search_query] = {
+            "link": (data or {}).get("link"),
+            "content": "\n".join(chunk for _, chunk in parts),
+        }
+
+    report = {
+        "tokens_before": tokens_before,
+        "tokens_after": used,
+        "tokens_saved": max(0, tokens_before - used),
+        "chunks_kept": len(kept),
+        "chunks_total": len(chunks),
+    }
+    return packed, report
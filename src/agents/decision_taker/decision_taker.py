@@ -4,7 +4,7 @@ from pathlib import Path
 from typing import Any, Dict, List, Optional
 
 from jinja2 import Environment, BaseLoader
-from src.llm import LLM
+from src.llm import LLM, RetryPolicy
 
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
@@ -18,9 +18,12 @@ class DecisionTaker:
 
     REQUIRED_KEYS = {"function", "args", "reply"}
 
-    def __init__(self, base_model: str, api_key: str) -> None:
+    def __init__(
+        self, base_model: str, api_key: str, retry_policy: Optional[RetryPolicy] = None
+    ) -> None:
         self.llm = LLM(base_model, api_key, agent_name="decision_taker")
-        self.max_retries = 5
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.max_retries = 3
         self.prompt_template = self._load_prompt()
 
     # -------------------------
@@ -34,17 +37,7 @@ class DecisionTaker:
         return path.read_text(encoding="utf-8").strip()
 
     def _call_llm(self, prompt: str) -> str:
-        for attempt in range(1, self.max_retries + 1):
-            try:
-                return self.llm.inference(prompt)
-            except Exception as exc:
-                logger.warning(
-                    "DecisionTaker LLM failed (attempt %s/%s): %s",
-                    attempt,
-                    self.max_retries,
-                    exc
-                )
-        raise RuntimeError("DecisionTaker LLM failed after max retries")
+        return self.retry_policy.call("DecisionTaker LLM", self.llm.inference, prompt)
 
     def _extract_json(self, text: str) -> Optional[List[Dict[str, Any]]]:
         """
@@ -106,6 +99,7 @@ class DecisionTaker:
         """
         for attempt in range(1, self.max_retries + 1):
             logger.info("DecisionTaker attempt %s/%s", attempt, self.max_retries)
+            self.retry_policy.check("DecisionTaker")
 
             rendered_prompt = self.render(prompt)
             response = self._call_llm(rendered_prompt)
@@ -116,5 +110,6 @@ class DecisionTaker:
                 return valid
 
             logger.warning("Invalid decision response, retrying...")
+            self.llm.invalidate(rendered_prompt)
 
         raise RuntimeError("DecisionTaker failed after maximum retries")
@@ -1,9 +1,10 @@
 import logging
+import time
 from pathlib import Path
-from typing import Dict, Tuple
+from typing import Dict, Generator, Optional, Tuple
 
 from jinja2 import Environment, BaseLoader
-from src.llm import LLM
+from src.llm import LLM, RetryPolicy
 
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
@@ -22,8 +23,9 @@ class Planner:
         "summary"
     }
 
-    def __init__(self, base_model: str, api_key: str):
+    def __init__(self, base_model: str, api_key: str, retry_policy: Optional[RetryPolicy] = None):
         self.llm = LLM(base_model, api_key, agent_name="planner")
+        self.retry_policy = retry_policy or RetryPolicy()
 
         self.prompt_template = self._load_prompt()
         self.max_retries = 3
@@ -39,17 +41,7 @@ class Planner:
         return path.read_text(encoding="utf-8").strip()
 
     def _call_llm(self, prompt: str) -> str:
-        for attempt in range(1, self.max_retries + 1):
-            try:
-                return self.llm.inference(prompt)
-            except Exception as exc:
-                logger.warning(
-                    "Planner LLM failed (attempt %s/%s): %s",
-                    attempt,
-                    self.max_retries,
-                    exc
-                )
-        raise RuntimeError("Planner LLM failed after max retries")
+        return self.retry_policy.call("Planner LLM", self.llm.inference, prompt)
 
     # -------------------------
     # Rendering
@@ -144,12 +136,61 @@ class Planner:
         """
         for attempt in range(1, self.max_retries + 1):
             logger.info("Planner attempt %s/%s", attempt, self.max_retries)
+            self.retry_policy.check("Planner")
 
             prompt = self.render(user_prompt)
             response = self._call_llm(prompt)
 
             if not self.validate_response(response):
                 logger.warning("Invalid planner response format, retrying...")
+                self.llm.invalidate(prompt)
+                continue
+
+            reply, plan = self.parse_response(response)
+            logger.info("Planner produced valid plan")
+            return reply, plan
+
+        raise RuntimeError("Planner failed after maximum retries")
+
+    def stream(self, user_prompt: str) -> Generator[Tuple[int, str], None, Tuple[str, Dict]]:
+        """
+        Same as execute(), but yields (attempt, chunk) pairs while the plan
+        is generated; attempt goes up whenever the stream restarts. The
+        parsed (reply, plan) is the generator's return value. Transient
+        provider errors are retried under the request's RetryPolicy without
+        using up one of the max_retries validation attempts.
+        """
+        prompt = self.render(user_prompt)
+        streams = 0   # stream runs, so the client can drop a restarted preview
+        failures = 0  # transient errors since the last complete response
+        attempt = 0   # complete responses checked
+        while attempt < self.max_retries:
+            self.retry_policy.check("Planner")
+            logger.info("Planner attempt %s/%s", attempt + 1, self.max_retries)
+
+            streams += 1
+            parts = []
+            started = time.monotonic()
+            try:
+                for chunk in self.llm.stream(prompt):
+                    parts.append(chunk)
+                    yield streams, chunk
+            except Exception as exc:
+                failures += 1
+                self.retry_policy.record("Planner LLM stream", failures, started, exc)
+                delay = self.retry_policy.should_retry(exc, failures)
+                if delay is None:
+                    raise
+                time.sleep(delay)
+                continue
+            self.retry_policy.record("Planner LLM stream", failures + 1, started)
+            failures = 0
+            attempt += 1
+
+            response = "".join(parts)
+            if not self.validate_response(response):
+                logger.warning("Invalid planner response format, retrying...")
+                self.llm.invalidate(prompt)
                 continue
 
             reply, plan = self.parse_response(response)
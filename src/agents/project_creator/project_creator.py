@@ -1,5 +1,5 @@
 from jinja2 import Environment, BaseLoader
-from src.llm import LLM
+from src.llm import LLM, RetryPolicy
 
 project_creator_planner_prompt = open(
     "src/agents/project_creator/prompt.jinja2"
@@ -7,8 +7,9 @@ project_creator_planner_prompt = open(
 
 
 class ProjectCreator:
-    def __init__(self, base_model, api_key):
+    def __init__(self, base_model, api_key, retry_policy=None):
         self.llm = LLM(base_model, api_key, agent_name="project_creator")
+        self.retry_policy = retry_policy or RetryPolicy()
 
     def render(self, project_name, description):
         env = Environment(loader=BaseLoader())
@@ -70,7 +71,7 @@ class ProjectCreator:
 
     def execute(self, project_name: str, description: str):
         prompt = self.render(project_name, description)
-        response = self.llm.inference(prompt)
+        response = self.retry_policy.call("ProjectCreator LLM", self.llm.inference, prompt)
 
         if not self.validate_response(response):
             raise ValueError("Invalid project planning response")
@@ -1,14 +1,15 @@
 import json
 from jinja2 import Environment, BaseLoader
-from src.llm import LLM
+from src.llm import LLM, RetryPolicy
 
 
 researcher_prompt = open("src/agents/researcher/prompt.jinja2").read().strip()
 
 
 class Researcher:
-    def __init__(self, base_model, api_key):
+    def __init__(self, base_model, api_key, retry_policy=None):
         self.llm = LLM(base_model, api_key, agent_name="researcher")
+        self.retry_policy = retry_policy or RetryPolicy()
         self.max_retries = 3
 
     def render(self, step_by_step_plan, contextual_keywords):
@@ -58,14 +59,16 @@ class Researcher:
 
         retries = 0
         while retries < self.max_retries:
+            self.retry_policy.check("Researcher")
             prompt = self.render(step_by_step_plan, contextual_keywords)
-            response = self.llm.inference(prompt)
+            response = self.retry_policy.call("Researcher LLM", self.llm.inference, prompt)
             valid_response = self.validate_response(response)
 
             if valid_response:
                 return valid_response
 
             print("Invalid response from the researcher, retrying...")
+            self.llm.invalidate(prompt)
             retries += 1
 
         raise RuntimeError("Failed to get valid researcher response after retries")
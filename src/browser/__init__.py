@@ -1,2 +1,4 @@
 from .browser import Browser
-from .search import GoogleSearch
\ No newline at end of file
+from .search import GoogleSearch
+from .search_cache import SearchCache, normalize_query, search_cache
+from .fetcher import domain_stats, fetch_all, fetch_query
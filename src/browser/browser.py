@@ -1,30 +1,89 @@
 # src/browser/browser.py
+import threading
+
 import requests
-from bs4 import BeautifulSoup
 from markdownify import markdownify as md
 
+from .extract import MAX_PAGE_BYTES, PAGE_TOKEN_BUDGET, extract_main_text, read_capped
+from .http_cache import HttpCache, http_cache
+
+
+class FetchCancelled(Exception):
+    """go_to() was abandoned because the `cancelled` event was set."""
+
 
 class Browser:
-    def __init__(self, timeout: int = 15):
+    def __init__(
+        self,
+        timeout: int = 15,
+        cache: HttpCache | None = http_cache,
+        max_bytes: int = MAX_PAGE_BYTES,
+        token_budget: int = PAGE_TOKEN_BUDGET,
+        cancelled: threading.Event | None = None,
+    ):
         self.session = requests.Session()
         self.timeout = timeout
-        self.response = None
-        self.soup = None
+        self.cancelled = cancelled
+        self.cache = cache
+        self.max_bytes = max_bytes
+        self.token_budget = token_budget
+        self.url = None
+        self.html = None
+        self.from_cache = False
+        self.truncated = False
+        self._text = None
+
+    def _load(self, url: str, html: str, text: str | None = None, from_cache: bool = False):
+        self.url = url
+        self.html = html
+        self.from_cache = from_cache
+        self.truncated = False
+        self._text = text
 
     def go_to(self, url: str):
-        self.response = self.session.get(url, timeout=self.timeout)
-        self.response.raise_for_status()
-        self.soup = BeautifulSoup(self.response.text, "html.parser")
+        cached = self.cache.get(url, self.session.headers) if self.cache else None
+        if cached and cached.fresh:
+            self._load(url, cached.html, cached.text, from_cache=True)
+            return
+
+        headers = cached.conditional_headers() if cached else {}
+        response = self.session.get(url, headers=headers, timeout=self.timeout, stream=True)
+
+        if cached and response.status_code == 304:
+            response.close()
+            self.cache.revalidated_ok(url, response.headers)
+            self._load(url, cached.html, cached.text, from_cache=True)
+            return
+
+        try:
+            response.raise_for_status()
+        except requests.HTTPError:
+            response.close()
+            raise
+
+        # Never hold more than max_bytes of a page in memory
+        html, truncated = read_capped(response, self.max_bytes, self.cancelled)
+        if self.cancelled is not None and self.cancelled.is_set():
+            raise FetchCancelled(url)
+        self._load(url, html)
+        self.truncated = truncated
+        # A cut-off body would be served later as if it were the whole page
+        if self.cache and not truncated:
+            self.cache.store(url, html, response.headers, response.request.headers)
 
     def get_html(self):
-        return self.response.text if self.response else None
+        return self.html
 
     def get_markdown(self):
         html = self.get_html()
         return md(html) if html else None
 
     def extract_text(self):
-        return self.soup.get_text(separator=" ", strip=True) if self.soup else None
+        if self._text is None and self.html is not None:
+            self._text = extract_main_text(self.html, self.token_budget)
+            if self.cache and not self.truncated:
+                self.cache.set_text(self.url, self._text)
+        return self._text
 
     def close(self):
         self.session.close()
@@ -0,0 +1,139 @@
+# src/browser/extract.py
+import os
+import re
+
+from lxml import etree
+
+from src.tokens import count_tokens, truncate_tokens
+
+MAX_PAGE_BYTES = int(os.getenv("BROWSER_MAX_PAGE_BYTES", str(2 * 1024 * 1024)))
+PAGE_TOKEN_BUDGET = int(os.getenv("BROWSER_PAGE_TOKENS", "3000"))
+
+# Subtrees that never hold main content
+SKIP_TAGS = {
+    "script", "style", "noscript", "template", "svg", "canvas", "iframe",
+    "nav", "footer", "aside", "form", "button", "select",
+}
+# Page and article headers: mostly chrome, but often hold the title
+HEADER_TAGS = {"header"}
+# Kept inside headers and exempt from MIN_BLOCK_WORDS: titles and code are short
+KEEP_TAGS = {"h1", "h2", "h3", "h4", "h5", "h6", "pre", "code"}
+# Tags that end a block of text
+BLOCK_TAGS = {
+    "p", "div", "section", "article", "main", "li", "ul", "ol", "table", "tr",
+    "td", "th", "pre", "blockquote", "br", "hr", "dd", "dt",
+    "h1", "h2", "h3", "h4", "h5", "h6",
+}
+# Blocks shorter than this are usually menus, breadcrumbs and buttons
+MIN_BLOCK_WORDS = 4
+
+_whitespace = re.compile(r"\s+")
+
+
+def read_capped(response, max_bytes: int = MAX_PAGE_BYTES, cancelled=None) -> tuple[str, bool]:
+    """
+    Read a streamed requests response up to `max_bytes`, or until the
+    `cancelled` event is set. Returns (text, truncated).
+    """
+    chunks = []
+    size = 0
+    truncated = False
+    for chunk in response.iter_content(chunk_size=64 * 1024):
+        chunks.append(chunk)
+        size += len(chunk)
+        if size >= max_bytes or (cancelled is not None and cancelled.is_set()):
+            truncated = True
+            break
+    response.close()
+
+    body = b"".join(chunks)[:max_bytes]
+    encoding = response.encoding or "utf-8"
+    return body.decode(encoding, errors="replace"), truncated
+
+
+class _TextTarget:
+    """lxml parser target: collects (text, keep) blocks without building a tree."""
+
+    def __init__(self):
+        self.blocks = []
+        self._current = []
+        self._current_keep = False
+        self._skip_depth = 0
+        self._header_depth = 0
+        self._keep_depth = 0
+
+    def _flush(self):
+        if self._current:
+            block = _whitespace.sub(" ", "".join(self._current)).strip()
+            if block:
+                self.blocks.append((block, self._current_keep))
+            self._current = []
+        self._current_keep = False
+
+    def start(self, tag, attrib):
+        tag = tag.lower() if isinstance(tag, str) else ""
+        if tag in SKIP_TAGS:
+            self._skip_depth += 1
+            return
+        if tag in BLOCK_TAGS and not self._skip_depth:
+            self._flush()
+        if tag in HEADER_TAGS:
+            self._header_depth += 1
+        elif tag in KEEP_TAGS:
+            self._keep_depth += 1
+
+    def end(self, tag):
+        tag = tag.lower() if isinstance(tag, str) else ""
+        if tag in SKIP_TAGS:
+            self._skip_depth = max(0, self._skip_depth - 1)
+            return
+        if tag in HEADER_TAGS:
+            self._header_depth = max(0, self._header_depth - 1)
+        elif tag in KEEP_TAGS:
+            self._keep_depth = max(0, self._keep_depth - 1)
+        if tag in BLOCK_TAGS and not self._skip_depth:
+            self._flush()
+
+    def data(self, data):
+        if self._skip_depth or (self._header_depth and not self._keep_depth):
+            return
+        self._current.append(data)
+        if self._keep_depth:
+            self._current_keep = True
+
+    def comment(self, text):
+        pass
+
+    def close(self):
+        self._flush()
+        return self.blocks
+
+
+def extract_blocks(html: str, chunk_size: int = 64 * 1024) -> list[str]:
+    """Text blocks of the page in document order, boilerplate removed."""
+    parser = etree.HTMLParser(target=_TextTarget(), recover=True, no_network=True)
+    for start in range(0, len(html), chunk_size):
+        parser.feed(html[start:start + chunk_size])
+    blocks = parser.close()
+
+    main = [b for b, keep in blocks if keep or len(b.split()) >= MIN_BLOCK_WORDS]
+    # A page that is nothing but short blocks is still better than nothing
+    return main or [b for b, _ in blocks]
+
+
+def extract_main_text(html: str, budget: int = PAGE_TOKEN_BUDGET) -> str:
+    """Main page text, truncated to `budget` tokens."""
+    if not html:
+        return ""
+    kept = []
+    used = 0
+    for block in extract_blocks(html):
+        tokens = count_tokens(block)
+        if used + tokens > budget:
+            remaining = budget - used
+            if remaining > 0:
+                kept.append(truncate_tokens(block, remaining))
+            break
+        kept.append(block)
+        used += tokens
+    return "\n".join(kept)
@@ -0,0 +1,227 @@
+# src/browser/fetcher.py
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from urllib.parse import urlparse
+
+from .browser import Browser, FetchCancelled
+from .search import GoogleSearch
+
+MAX_WORKERS = int(os.getenv("RESEARCH_MAX_WORKERS", "8"))
+PER_HOST_LIMIT = int(os.getenv("RESEARCH_PER_HOST_LIMIT", "2"))
+RESEARCH_DEADLINE = float(os.getenv("RESEARCH_DEADLINE", "30"))
+# How many search results a query may race, and how long to wait before
+# starting the next one
+HEDGE_LINKS = int(os.getenv("RESEARCH_HEDGE_LINKS", "3"))
+HEDGE_DELAY = float(os.getenv("RESEARCH_HEDGE_DELAY", "2"))
+
+_executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="research")
+# Separate pool: link fetches are submitted from inside research tasks
+_link_executor = ThreadPoolExecutor(
+    max_workers=MAX_WORKERS * HEDGE_LINKS, thread_name_prefix="research-link"
+)
+
+
+class HostLimiter:
+    """Caps concurrent requests per host across every research run in the process."""
+
+    def __init__(self, limit: int = PER_HOST_LIMIT):
+        self.limit = limit
+        self._semaphores: dict[str, threading.BoundedSemaphore] = {}
+        self._lock = threading.Lock()
+
+    def _semaphore(self, host: str) -> threading.BoundedSemaphore:
+        with self._lock:
+            sem = self._semaphores.get(host)
+            if sem is None:
+                sem = threading.BoundedSemaphore(self.limit)
+                self._semaphores[host] = sem
+            return sem
+
+    def acquire(self, url: str, timeout: float) -> threading.BoundedSemaphore | None:
+        sem = self._semaphore(urlparse(url).netloc.lower())
+        return sem if sem.acquire(timeout=max(0.0, timeout)) else None
+
+
+host_limiter = HostLimiter()
+
+
+class DomainStats:
+    """Per-host fetch latency and failure counts, used to order hedged fetches."""
+
+    # Hosts failing at least this often (after a few tries) are tried last
+    FAILURE_THRESHOLD = 0.5
+    MIN_SAMPLES = 3
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._hosts: dict[str, dict] = {}
+
+    def record(self, url: str, seconds: float, ok: bool):
+        host = urlparse(url).netloc.lower()
+        with self._lock:
+            entry = self._hosts.setdefault(
+                host, {"requests": 0, "failures": 0, "avg_seconds": 0.0}
+            )
+            entry["requests"] += 1
+            if not ok:
+                entry["failures"] += 1
+            if entry["requests"] == 1:
+                entry["avg_seconds"] = seconds
+            else:
+                # Exponentially weighted, so a host that recovers is noticed
+                entry["avg_seconds"] += 0.2 * (seconds - entry["avg_seconds"])
+
+    def unreliable(self, url: str) -> bool:
+        with self._lock:
+            entry = self._hosts.get(urlparse(url).netloc.lower())
+            if not entry or entry["requests"] < self.MIN_SAMPLES:
+                return False
+            return entry["failures"] / entry["requests"] >= self.FAILURE_THRESHOLD
+
+    def _avg_seconds(self, url: str) -> float | None:
+        with self._lock:
+            entry = self._hosts.get(urlparse(url).netloc.lower())
+            return entry["avg_seconds"] if entry else None
+
+    def order(self, links: list[str], limit: int) -> list[str]:
+        """
+        The top `limit` links by search rank, reordered so unreliable hosts
+        go last and known-fast hosts are tried first. Hosts without timings
+        keep their search position rather than counting as fast.
+        """
+        top = links[:limit]
+        latency = {link: self._avg_seconds(link) for link in top}
+        # Timed hosts trade places among themselves by latency; untimed stay put
+        fastest = iter(sorted((l for l in top if latency[l] is not None), key=latency.get))
+        by_latency = [next(fastest) if latency[link] is not None else link for link in top]
+        return sorted(by_latency, key=self.unreliable)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                host: {**entry, "avg_seconds": round(entry["avg_seconds"], 3)}
+                for host, entry in self._hosts.items()
+            }
+
+
+domain_stats = DomainStats()
+
+
+def _empty():
+    return {"link": None, "content": ""}
+
+
+def _fetch_link(link: str, deadline: float, cancelled: threading.Event) -> dict:
+    if cancelled.is_set():
+        return {"link": link, "content": ""}
+
+    sem = host_limiter.acquire(link, deadline - time.monotonic())
+    if sem is None:
+        print(f"Timed out waiting for a slot on {urlparse(link).netloc}")
+        return {"link": link, "content": ""}
+
+    browser = Browser(timeout=max(1, min(15, deadline - time.monotonic())), cancelled=cancelled)
+    started = time.monotonic()
+    try:
+        if cancelled.is_set():
+            return {"link": link, "content": ""}
+        browser.go_to(link)
+        # Another link already won; skip extraction and don't count this against the host
+        if cancelled.is_set():
+            return {"link": link, "content": ""}
+        content = (browser.extract_text() or "").strip()
+        domain_stats.record(link, time.monotonic() - started, bool(content))
+        return {"link": link, "content": content}
+    except FetchCancelled:
+        return {"link": link, "content": ""}
+    except Exception as e:
+        domain_stats.record(link, time.monotonic() - started, False)
+        print(f"Failed to fetch {link}: {e}")
+        return {"link": link, "content": ""}
+    finally:
+        browser.close()
+        sem.release()
+
+
+def fetch_query(query: str, deadline: float) -> dict:
+    """
+    Search one query and race its top results: the first link is fetched
+    right away, the next one starts if it fails or is still running after
+    HEDGE_DELAY. The first page with content wins and the rest are dropped.
+    Uses its own GoogleSearch/Browser objects so concurrent calls share no state.
+    """
+    google_search = GoogleSearch()
+    google_search.search(query)
+
+    links = [
+        link for link in google_search.query_result
+        if link.startswith(("http://", "https://"))
+    ]
+    if not links:
+        print(f"No usable search results found for: {query}")
+        return _empty()
+
+    candidates = iter(domain_stats.order(links, HEDGE_LINKS))
+    cancelled = threading.Event()
+    pending = set()
+    fallback = {"link": links[0], "content": ""}
+
+    def launch() -> bool:
+        link = next(candidates, None)
+        if link is not None:
+            pending.add(_link_executor.submit(_fetch_link, link, deadline, cancelled))
+        return link is not None
+
+    launch()
+    while pending:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+
+        done, _ = wait(pending, timeout=min(HEDGE_DELAY, remaining), return_when=FIRST_COMPLETED)
+        pending.difference_update(done)
+        for future in done:
+            result = future.result()
+            if result["content"]:
+                cancelled.set()
+                for other in pending:
+                    other.cancel()
+                return result
+
+        # Nothing useful yet: a slow or failed fetch gets a backup
+        launch()
+
+    cancelled.set()
+    for other in pending:
+        other.cancel()
+    return fallback
+
+
+def fetch_all(queries, deadline: float = RESEARCH_DEADLINE) -> dict:
+    """
+    Run search + fetch for every query concurrently. Queries still running
+    when the overall deadline passes come back empty.
+    """
+    expires_at = time.monotonic() + deadline
+    futures = {}
+    for query in queries:
+        query = query.strip().lower()
+        if query and query not in futures:
+            futures[query] = _executor.submit(fetch_query, query, expires_at)
+
+    wait(futures.values(), timeout=deadline)
+
+    results = {}
+    for query, future in futures.items():
+        if future.done() and not future.exception():
+            results[query] = future.result()
+        else:
+            if not future.done():
+                future.cancel()
+                print(f"Research deadline exceeded for: {query}")
+            else:
+                print(f"Research failed for {query}: {future.exception()}")
+            results[query] = _empty()
+    return results
@@ -0,0 +1,250 @@
+# src/browser/http_cache.py
+import email.utils
+import json
+import os
+import re
+import sqlite3
+import tempfile
+import time
+from dataclasses import dataclass
+
+from src.sqlite_store import SQLiteStore, open_default
+
+# Empty string disables the cache
+CACHE_DB = os.getenv(
+    "BROWSER_CACHE_DB",
+    os.path.join(tempfile.gettempdir(), "nexa_browser_cache.sqlite3"),
+)
+CACHE_MAX_BYTES = int(os.getenv("BROWSER_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+
+# Used when a response has validators but no explicit freshness lifetime
+HEURISTIC_MAX_AGE = 24 * 3600
+
+_max_age = re.compile(r"(?:s-maxage|max-age)\s*=\s*(\d+)")
+
+
+@dataclass
+class CachedPage:
+    url: str
+    html: str
+    text: str | None
+    etag: str | None
+    last_modified: str | None
+    expires_at: float
+
+    @property
+    def fresh(self) -> bool:
+        return time.time() < self.expires_at
+
+    def conditional_headers(self) -> dict:
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+def _parse_date(value: str | None) -> float | None:
+    if not value:
+        return None
+    try:
+        return email.utils.parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError):
+        return None
+
+
+def _vary_names(headers) -> list[str] | None:
+    """Request headers the response varies on, or None for 'Vary: *'."""
+    names = [n.strip().lower() for n in headers.get("Vary", "").split(",") if n.strip()]
+    return None if "*" in names else sorted(names)
+
+
+def vary_key(vary_names: list[str], request_headers) -> str:
+    """The request's values for the Vary headers, as stored next to the page."""
+    request_headers = {k.lower(): v for k, v in (request_headers or {}).items()}
+    return json.dumps([(name, request_headers.get(name)) for name in vary_names])
+
+
+def freshness(headers) -> float | None:
+    """
+    Seconds the response may be served without revalidation, or None if
+    it must not be stored at all (RFC 9111, simplified). The cache is
+    shared by every user, so 'private' responses are not stored either,
+    nor are ones that could never be reused or revalidated.
+    """
+    cache_control = headers.get("Cache-Control", "").lower()
+    if "no-store" in cache_control or "private" in cache_control:
+        return None
+    if _vary_names(headers) is None:
+        return None
+    has_validators = bool(headers.get("ETag") or headers.get("Last-Modified"))
+    if "no-cache" in cache_control:
+        return 0.0 if has_validators else None
+
+    match = _max_age.search(cache_control)
+    if match:
+        return float(match.group(1))
+
+    now = _parse_date(headers.get("Date")) or time.time()
+    expires = _parse_date(headers.get("Expires"))
+    if expires is not None:
+        return max(0.0, expires - now)
+
+    last_modified = _parse_date(headers.get("Last-Modified"))
+    if last_modified is not None:
+        return min(HEURISTIC_MAX_AGE, max(0.0, (now - last_modified) / 10))
+
+    return 0.0 if has_validators else None
+
+
+class HttpCache(SQLiteStore):
+    """
+    On-disk page cache in a single SQLite file, shared by every worker.
+    Stores the body, its validators and the extracted page text; evicts
+    least recently used pages once the total body size passes `max_bytes`.
+    The total is kept up to date by triggers rather than summed per insert.
+    """
+
+    def __init__(self, path: str = CACHE_DB, max_bytes: int = CACHE_MAX_BYTES):
+        super().__init__(path)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+
+        conn = self._db()
+        conn.executescript(
+            "CREATE TABLE IF NOT EXISTS pages ("
+            " url TEXT PRIMARY KEY, html TEXT NOT NULL, text TEXT,"
+            " etag TEXT, last_modified TEXT, expires_at REAL NOT NULL,"
+            " size INTEGER NOT NULL, last_access REAL NOT NULL,"
+            " vary TEXT NOT NULL DEFAULT '[]');"
+            "CREATE INDEX IF NOT EXISTS pages_last_access ON pages (last_access);"
+        )
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(pages)")}
+        if "vary" not in columns:
+            try:
+                conn.execute("ALTER TABLE pages ADD COLUMN vary TEXT NOT NULL DEFAULT '[]'")
+            except sqlite3.OperationalError:
+                pass  # another worker added it first
+        conn.executescript(
+            "BEGIN IMMEDIATE;"
+            "CREATE TABLE IF NOT EXISTS pages_size ("
+            " id INTEGER PRIMARY KEY CHECK (id = 0), bytes INTEGER NOT NULL);"
+            "INSERT OR IGNORE INTO pages_size (id, bytes)"
+            " SELECT 0, COALESCE(SUM(size), 0) FROM pages;"
+            "CREATE TRIGGER IF NOT EXISTS pages_size_insert AFTER INSERT ON pages BEGIN"
+            " UPDATE pages_size SET bytes = bytes + NEW.size; END;"
+            "CREATE TRIGGER IF NOT EXISTS pages_size_delete AFTER DELETE ON pages BEGIN"
+            " UPDATE pages_size SET bytes = bytes - OLD.size; END;"
+            "CREATE TRIGGER IF NOT EXISTS pages_size_update AFTER UPDATE OF size ON pages BEGIN"
+            " UPDATE pages_size SET bytes = bytes + NEW.size - OLD.size; END;"
+            "COMMIT;"
+        )
+
+    def get(self, url: str, request_headers=None) -> CachedPage | None:
+        row = self._db().execute(
+            "SELECT url, html, text, etag, last_modified, expires_at, vary "
+            "FROM pages WHERE url = ?",
+            (url,),
+        ).fetchone()
+        # Stored for a request whose Vary headers differ from this one
+        if row is not None and row[6] != vary_key(
+            [name for name, _ in json.loads(row[6])], request_headers
+        ):
+            row = None
+        if row is None:
+            self._count("misses")
+            return None
+
+        self._db().execute(
+            "UPDATE pages SET last_access = ? WHERE url = ?", (time.time(), url)
+        )
+        page = CachedPage(*row[:6])
+        if page.fresh:
+            self._count("hits")
+        return page
+
+    def store(self, url: str, html: str, headers, request_headers=None) -> None:
+        lifetime = freshness(headers)
+        if lifetime is None:
+            self.delete(url)
+            return
+
+        size = len(html.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+
+        now = time.time()
+        # An upsert, not INSERT OR REPLACE: REPLACE skips the delete trigger
+        self._db().execute(
+            "INSERT INTO pages "
+            "(url, html, text, etag, last_modified, expires_at, size, last_access, vary) "
+            "VALUES (?, ?, NULL, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT (url) DO UPDATE SET html = excluded.html, text = NULL, "
+            "etag = excluded.etag, last_modified = excluded.last_modified, "
+            "expires_at = excluded.expires_at, size = excluded.size, "
+            "last_access = excluded.last_access, vary = excluded.vary",
+            (
+                url,
+                html,
+                headers.get("ETag"),
+                headers.get("Last-Modified"),
+                now + lifetime,
+                size,
+                now,
+                vary_key(_vary_names(headers), request_headers),
+            ),
+        )
+        self._evict()
+
+    def revalidated_ok(self, url: str, headers) -> None:
+        """The origin answered 304: extend the stored page's lifetime."""
+        self._count("revalidated")
+        lifetime = freshness(headers) or 0.0
+        self._db().execute(
+            "UPDATE pages SET expires_at = ?, "
+            "etag = COALESCE(?, etag), last_modified = COALESCE(?, last_modified) "
+            "WHERE url = ?",
+            (
+                time.time() + lifetime,
+                headers.get("ETag"),
+                headers.get("Last-Modified"),
+                url,
+            ),
+        )
+
+    def set_text(self, url: str, text: str) -> None:
+        self._db().execute("UPDATE pages SET text = ? WHERE url = ?", (text, url))
+
+    def delete(self, url: str) -> None:
+        self._db().execute("DELETE FROM pages WHERE url = ?", (url,))
+
+    def _evict(self):
+        conn = self._db()
+        total = conn.execute("SELECT bytes FROM pages_size").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        # Trim to 90% so we don't evict on every single insert
+        target = total - int(self.max_bytes * 0.9)
+        freed = 0
+        victims = []
+        for url, size in conn.execute("SELECT url, size FROM pages ORDER BY last_access"):
+            victims.append((url,))
+            freed += size
+            if freed >= target:
+                break
+        conn.executemany("DELETE FROM pages WHERE url = ?", victims)
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            return {
+                "hits": self.hits,
+                "revalidated": self.revalidated,
+                "misses": self.misses,
+            }
+
+
+http_cache = open_default(HttpCache, CACHE_DB, "Browser cache")
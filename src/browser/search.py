@@ -1,24 +1,70 @@
 # src/browser/search.py
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
 from ddgs import DDGS
 
+from .search_cache import SearchCache, normalize_query, search_cache
+
+# Background refreshes for stale cache entries
+_refresher = ThreadPoolExecutor(max_workers=2, thread_name_prefix="search-refresh")
+_refreshing: set[tuple[str, int]] = set()
+_refreshing_lock = threading.Lock()
+
 
 class GoogleSearch:
-    def __init__(self, max_results: int = 5):
+    def __init__(self, max_results: int = 5, cache: SearchCache | None = search_cache):
         self.max_results = max_results
+        self.cache = cache
         self.query_result = []
 
-    def search(self, query: str):
-        self.query_result = []
+    def _search(self, query: str) -> list[str]:
+        started = time.perf_counter()
         try:
             with DDGS() as ddgs:
                 results = ddgs.text(query, max_results=self.max_results)
-                self.query_result = [
-                    r.get("href") for r in results if r.get("href")
-                ]
-            return self.query_result
+                links = [r.get("href") for r in results if r.get("href")]
         except Exception as err:
             print(f"Search error: {err}")
             return []
 
+        # Don't let an empty/failed search overwrite a good cached result
+        if links and self.cache:
+            self.cache.put(query, self.max_results, links, time.perf_counter() - started)
+        return links
+
+    def _refresh_later(self, query: str):
+        key = (query, self.max_results)
+        with _refreshing_lock:
+            if key in _refreshing:
+                return
+            _refreshing.add(key)
+
+        def refresh():
+            try:
+                self._search(query)
+            finally:
+                with _refreshing_lock:
+                    _refreshing.discard(key)
+
+        _refresher.submit(refresh)
+
+    def search(self, query: str):
+        query = normalize_query(query)
+        self.query_result = []
+
+        if self.cache:
+            links, needs_refresh = self.cache.get(query, self.max_results)
+            if links is not None:
+                # Serve stale results immediately and refresh in the background
+                if needs_refresh:
+                    self._refresh_later(query)
+                self.query_result = links
+                return self.query_result
+
+        self.query_result = self._search(query)
+        return self.query_result
+
     def get_first_link(self):
         return self.query_result[0] if self.query_result else None
@@ -0,0 +1,106 @@
+# src/browser/search_cache.py
+import json
+import os
+import re
+import sqlite3
+import time
+
+from src.sqlite_store import SQLiteStore, open_default
+
+from .http_cache import CACHE_DB
+
+SEARCH_CACHE_TTL = float(os.getenv("SEARCH_CACHE_TTL", str(24 * 3600)))
+# How long past the TTL a stale result may still be served while it refreshes
+SEARCH_CACHE_STALE = float(os.getenv("SEARCH_CACHE_STALE", str(7 * 24 * 3600)))
+
+_whitespace = re.compile(r"\s+")
+
+
+def normalize_query(query: str) -> str:
+    """'Flask login tutorial ' and 'flask  login tutorial' share one entry."""
+    return _whitespace.sub(" ", query).strip().strip("?!.").strip().lower()
+
+
+class SearchCache(SQLiteStore):
+    """
+    Persisted search results with a TTL and a stale-while-revalidate
+    window, stored next to the page cache. Each row keeps how long its
+    search took, so hits can report the search latency they removed.
+    """
+
+    def __init__(
+        self,
+        path: str = CACHE_DB,
+        ttl: float = SEARCH_CACHE_TTL,
+        stale: float = SEARCH_CACHE_STALE,
+    ):
+        super().__init__(path)
+        self.ttl = ttl
+        self.stale = stale
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.seconds_saved = 0.0
+
+        conn = self._db()
+        conn.executescript(
+            "CREATE TABLE IF NOT EXISTS searches ("
+            " query TEXT NOT NULL, max_results INTEGER NOT NULL,"
+            " links TEXT NOT NULL, fetched_at REAL NOT NULL,"
+            " latency REAL NOT NULL DEFAULT 0,"
+            " PRIMARY KEY (query, max_results));"
+            "CREATE INDEX IF NOT EXISTS searches_fetched_at ON searches (fetched_at);"
+        )
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(searches)")}
+        if "latency" not in columns:
+            try:
+                conn.execute("ALTER TABLE searches ADD COLUMN latency REAL NOT NULL DEFAULT 0")
+            except sqlite3.OperationalError:
+                pass  # another worker added it first
+
+    def get(self, query: str, max_results: int) -> tuple[list[str] | None, bool]:
+        """
+        Returns (links, needs_refresh). links is None when nothing usable is
+        cached; needs_refresh is True when the links are stale.
+        """
+        row = self._db().execute(
+            "SELECT links, fetched_at, latency FROM searches WHERE query = ? AND max_results = ?",
+            (query, max_results),
+        ).fetchone()
+
+        if row is not None:
+            age = time.time() - row[1]
+            if age < self.ttl + self.stale:
+                self._count("hits" if age < self.ttl else "stale_hits")
+                self._count("seconds_saved", row[2])
+                return json.loads(row[0]), age >= self.ttl
+
+        self._count("misses")
+        return None, True
+
+    def put(self, query: str, max_results: int, links: list[str], latency: float = 0.0):
+        now = time.time()
+        conn = self._db()
+        conn.execute(
+            "INSERT OR REPLACE INTO searches (query, max_results, links, fetched_at, latency) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (query, max_results, json.dumps(links), now, latency),
+        )
+        # Rows past the stale window can never be served again
+        conn.execute(
+            "DELETE FROM searches WHERE fetched_at < ?", (now - self.ttl - self.stale,)
+        )
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            lookups = self.hits + self.stale_hits + self.misses
+            return {
+                "hits": self.hits,
+                "stale_hits": self.stale_hits,
+                "misses": self.misses,
+                "hit_ratio": (self.hits + self.stale_hits) / lookups if lookups else 0.0,
+                "seconds_saved": round(self.seconds_saved, 3),
+            }
+
+
+search_cache = open_default(SearchCache, CACHE_DB, "Search cache")
@@ -1 +1,11 @@
-from .keyword_extractor import SentenceBert
\ No newline at end of file
+from .keyword_extractor import (
+    KeywordBatcher,
+    SentenceBert,
+    extract_keywords,
+    get_batcher,
+    get_extractor,
+    get_model,
+    preload,
+    stats,
+)
+from .statistical import StatisticalKeywords, build_idf_table, save_idf_table
@@ -0,0 +1,258 @@
+# src/keyword_extractor/embedding_cache.py
+import hashlib
+import logging
+import os
+import re
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Callable
+
+import numpy as np
+
+from src.sqlite_store import SQLiteStore
+
+logger = logging.getLogger(__name__)
+
+CACHE_SIZE = int(os.getenv("KEYWORD_EMBEDDING_CACHE_SIZE", "20000"))
+CACHE_DIR = os.getenv("KEYWORD_EMBEDDING_CACHE_DIR")
+DISK_CACHE_SIZE = int(os.getenv("KEYWORD_EMBEDDING_DISK_CACHE_SIZE", "200000"))
+
+_whitespace = re.compile(r"\s+")
+
+
+def text_key(model: str, text: str) -> str:
+    normalized = _whitespace.sub(" ", text).strip()
+    return hashlib.sha1(f"{model}\0{normalized}".encode("utf-8")).hexdigest()
+
+
+# -------------------------
+# On-disk tier
+# -------------------------
+INDEX_FILE = "index.sqlite3"
+KEY_BYTES = 20  # text_key() is a sha1 hex digest
+
+
+def read_store_dim(path: str) -> int | None:
+    """Vector width of the store at `path`, or None if there isn't one."""
+    index_path = os.path.join(path, INDEX_FILE)
+    if not os.path.exists(index_path):
+        return None
+    try:
+        conn = sqlite3.connect(index_path, timeout=30)
+        try:
+            row = conn.execute("SELECT value FROM meta WHERE name = 'dim'").fetchone()
+        finally:
+            conn.close()
+    except sqlite3.Error:
+        return None
+    return row[0] if row else None
+
+
+class DiskEmbeddingStore(SQLiteStore):
+    """
+    Fixed-capacity memory-mapped float32 matrix with a SQLite index of
+    key -> row. Rows are reused round-robin, so when full the oldest
+    written row goes first. Each row's key digest is stored next to its
+    vector and checked on read, so a row rewritten by another process
+    between the index lookup and the copy reads as a miss.
+    """
+
+    def __init__(self, path: str, dim: int, capacity: int = DISK_CACHE_SIZE):
+        os.makedirs(path, exist_ok=True)
+        self.dim = dim
+        self.capacity = capacity
+        super().__init__(os.path.join(path, INDEX_FILE))
+
+        data_path = os.path.join(path, f"vectors_{dim}.f32")
+        keys_path = os.path.join(path, f"keys_{dim}.sha1")
+        fresh = not (os.path.exists(data_path) and os.path.exists(keys_path))
+        mode = "w+" if fresh else "r+"
+        self._vectors = np.memmap(data_path, dtype=np.float32, mode=mode, shape=(capacity, dim))
+        self._keys = np.memmap(keys_path, dtype=np.uint8, mode=mode, shape=(capacity, KEY_BYTES))
+
+        conn = self._db()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS rows ("
+                " key TEXT PRIMARY KEY, row INTEGER NOT NULL UNIQUE)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value INTEGER NOT NULL)"
+            )
+            meta = dict(conn.execute("SELECT name, value FROM meta").fetchall())
+            # Rows from another width or capacity point at the wrong vectors
+            if fresh or meta.get("dim") != dim or meta.get("capacity") != capacity:
+                conn.execute("DELETE FROM rows")
+                conn.execute(
+                    "INSERT OR REPLACE INTO meta (name, value) VALUES "
+                    "('dim', ?), ('capacity', ?), ('next_row', 0)",
+                    (dim, capacity),
+                )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def get(self, key: str) -> np.ndarray | None:
+        try:
+            row = self._db().execute("SELECT row FROM rows WHERE key = ?", (key,)).fetchone()
+        except sqlite3.Error as e:
+            logger.warning("Embedding index lookup failed: %s", e)
+            return None
+        if row is None:
+            return None
+
+        digest = np.frombuffer(bytes.fromhex(key), dtype=np.uint8)
+        keys = self._keys[row[0]]
+        if not np.array_equal(keys, digest):
+            return None
+        vector = np.array(self._vectors[row[0]])
+        # Checked again after the copy: a writer clears the key first
+        if not np.array_equal(keys, digest):
+            return None
+        return vector
+
+    def put_many(self, items: dict[str, np.ndarray]):
+        conn = self._db()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            next_row = conn.execute("SELECT value FROM meta WHERE name = 'next_row'").fetchone()[0]
+            for key, vector in items.items():
+                if conn.execute("SELECT 1 FROM rows WHERE key = ?", (key,)).fetchone():
+                    continue
+                row = next_row % self.capacity
+                next_row += 1
+
+                conn.execute("DELETE FROM rows WHERE row = ?", (row,))
+                self._keys[row] = 0
+                self._vectors[row] = vector
+                self._keys[row] = np.frombuffer(bytes.fromhex(key), dtype=np.uint8)
+                conn.execute("INSERT INTO rows (key, row) VALUES (?, ?)", (key, row))
+
+            self._vectors.flush()
+            self._keys.flush()
+            conn.execute("UPDATE meta SET value = ? WHERE name = 'next_row'", (next_row,))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+
+# -------------------------
+# In-memory LRU + optional disk tier
+# -------------------------
+class EmbeddingCache:
+    def __init__(self, max_entries: int = CACHE_SIZE, path: str | None = CACHE_DIR):
+        self.max_entries = max_entries
+        self.path = path
+        self._entries: OrderedDict[str, np.ndarray] = OrderedDict()
+        self._disk: dict[str, DiskEmbeddingStore] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def _model_dir(self, model: str) -> str:
+        return os.path.join(self.path, re.sub(r"[^\w.-]", "_", model))
+
+    def _existing_store(self, model: str) -> DiskEmbeddingStore | None:
+        """Open a store left by a previous process, if any."""
+        if not self.path or model in self._disk:
+            return self._disk.get(model)
+
+        dim = read_store_dim(self._model_dir(model))
+        if dim is None:
+            return None
+
+        self._disk[model] = DiskEmbeddingStore(self._model_dir(model), dim)
+        return self._disk[model]
+
+    def _disk_store(self, model: str, dim: int) -> DiskEmbeddingStore | None:
+        if not self.path:
+            return None
+        store = self._disk.get(model)
+        if store is None or store.dim != dim:
+            store = DiskEmbeddingStore(self._model_dir(model), dim)
+            self._disk[model] = store
+        return store
+
+    def _remember(self, key: str, vector: np.ndarray):
+        self._entries[key] = vector
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _lookup(self, model: str, key: str) -> np.ndarray | None:
+        with self._lock:
+            vector = self._entries.get(key)
+            if vector is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return vector
+            store = self._existing_store(model)
+
+        if store is not None:
+            vector = store.get(key)
+            if vector is not None:
+                with self._lock:
+                    self._remember(key, vector)
+                    self.disk_hits += 1
+                return vector
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def embed(
+        self,
+        model: str,
+        texts: list[str],
+        embed_fn: Callable[[list[str]], np.ndarray],
+    ) -> np.ndarray:
+        """Return embeddings for `texts`, calling `embed_fn` only for cache misses."""
+        keys = [text_key(model, t) for t in texts]
+        vectors: dict[str, np.ndarray] = {}
+        missing: dict[str, str] = {}
+
+        for key, text in zip(keys, texts):
+            if key in vectors or key in missing:
+                continue
+            vector = self._lookup(model, key)
+            if vector is None:
+                missing[key] = text
+            else:
+                vectors[key] = vector
+
+        if missing:
+            fresh = np.asarray(embed_fn(list(missing.values())), dtype=np.float32)
+            computed = dict(zip(missing.keys(), fresh))
+            vectors.update(computed)
+
+            with self._lock:
+                for key, vector in computed.items():
+                    self._remember(key, vector)
+                store = self._disk_store(model, fresh.shape[1])
+
+            if store is not None:
+                try:
+                    store.put_many(computed)
+                except (OSError, sqlite3.Error) as e:
+                    logger.warning("Embedding disk cache write failed: %s", e)
+
+        return np.vstack([vectors[key] for key in keys])
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_ratio": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+            }
+
+
+embedding_cache = EmbeddingCache()
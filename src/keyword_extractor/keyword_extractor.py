@@ -1,22 +1,264 @@
 # src/keyword_extractor/keyword_extractor.py
-from keybert import KeyBERT
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Future
+from queue import Empty, Queue
+
+from sklearn.feature_extraction.text import CountVectorizer
+
+from .embedding_cache import embedding_cache
+from .statistical import StatisticalKeywords
+
+logger = logging.getLogger(__name__)
+
+# "keybert" (sentence-transformers) or "statistical" (TF-IDF, no torch)
+KEYWORD_BACKEND = os.getenv("KEYWORD_BACKEND", "keybert").lower()
+
+
+# -------------------------
+# Shared model pool
+# -------------------------
+_models: dict = {}
+_models_lock = threading.Lock()
+
+_metrics_lock = threading.Lock()
+_metrics = {
+    "model_loads": 0,
+    "model_load_seconds": 0.0,
+    "calls": 0,
+    "call_seconds": 0.0,
+}
+
+
+def _record(**deltas):
+    with _metrics_lock:
+        for name, value in deltas.items():
+            _metrics[name] += value
+
+
+def get_model(model: str | None = None):
+    """
+    Return the process-wide KeyBERT instance for `model`,
+    loading it on first use. Safe to call from many threads.
+    """
+    # Imported here so the statistical backend never pulls in torch
+    from keybert import KeyBERT
+
+    kw_model = _models.get(model)
+    if kw_model is not None:
+        return kw_model
+
+    with _models_lock:
+        kw_model = _models.get(model)
+        if kw_model is None:
+            started = time.perf_counter()
+            kw_model = KeyBERT(model=model)
+            elapsed = time.perf_counter() - started
+
+            _models[model] = kw_model
+            _record(model_loads=1, model_load_seconds=elapsed)
+            logger.info("Loaded KeyBERT model %r in %.2fs", model, elapsed)
+
+    return kw_model
+
+
+def preload(model: str | None = None) -> None:
+    """Load the model ahead of the first request (e.g. in a gunicorn worker)."""
+    if KEYWORD_BACKEND == "keybert":
+        get_model(model)
+
+
+def stats() -> dict:
+    with _metrics_lock:
+        snapshot = dict(_metrics)
+
+    calls = snapshot["calls"]
+    snapshot["avg_call_seconds"] = snapshot["call_seconds"] / calls if calls else 0.0
+    snapshot["loaded_models"] = [name or "default" for name in _models]
+    snapshot["embedding_cache"] = embedding_cache.stats()
+    return snapshot
 
 
 class SentenceBert:
     def __init__(self, model: str | None = None):
-        self.kw_model = KeyBERT(model=model)
+        self.model_name = model or "default"
+        self.kw_model = get_model(model)
 
-    def extract_keywords(self, sentence: str, top_n: int = 5) -> list[str]:
-        if not sentence or not sentence.strip():
-            return []
+    def _embed(self, texts: list[str]):
+        return embedding_cache.embed(
+            self.model_name, texts, self.kw_model.model.embed
+        )
 
-        keywords = self.kw_model.extract_keywords(
-            sentence,
-            keyphrase_ngram_range=(1, 1),
-            stop_words="english",
+    def _extract(self, docs, top_n: int):
+        doc_list = [docs] if isinstance(docs, str) else docs
+
+        # Same candidate vocabulary KeyBERT would build, so cached
+        # word embeddings line up with its feature order
+        vectorizer = CountVectorizer(ngram_range=(1, 1), stop_words="english")
+        try:
+            words = vectorizer.fit(doc_list).get_feature_names_out()
+        except ValueError:
+            # Only stop words in the input
+            return [] if isinstance(docs, str) or len(docs) == 1 else [[] for _ in docs]
+
+        return self.kw_model.extract_keywords(
+            docs,
+            vectorizer=vectorizer,
             top_n=top_n,
             use_mmr=True,
             diversity=0.7,
+            doc_embeddings=self._embed(doc_list),
+            word_embeddings=self._embed(list(words)),
         )
 
+    def extract_keywords(self, sentence: str, top_n: int = 5) -> list[str]:
+        if not sentence or not sentence.strip():
+            return []
+
+        started = time.perf_counter()
+        keywords = self._extract(sentence, top_n)
+        _record(calls=1, call_seconds=time.perf_counter() - started)
+
         return [word for word, _ in keywords]
+
+    def extract_keywords_batch(
+        self, sentences: list[str], top_n: int = 5
+    ) -> list[list[str]]:
+        """
+        Extract keywords for many sentences at once.
+        KeyBERT embeds all documents and the shared candidate
+        vocabulary in a single pass when given a list.
+        """
+        results: list[list[str]] = [[] for _ in sentences]
+        indexed = [
+            (i, s) for i, s in enumerate(sentences) if s and s.strip()
+        ]
+        if not indexed:
+            return results
+
+        started = time.perf_counter()
+        keywords = self._extract([s for _, s in indexed], top_n)
+        _record(calls=len(indexed), call_seconds=time.perf_counter() - started)
+
+        # KeyBERT unwraps the outer list when only one document is passed
+        if len(indexed) == 1:
+            keywords = [keywords]
+
+        for (i, _), doc_keywords in zip(indexed, keywords):
+            results[i] = [word for word, _ in doc_keywords]
+
+        return results
+
+
+# -------------------------
+# Micro-batcher
+# -------------------------
+class KeywordBatcher:
+    """
+    Coalesces concurrent extract_keywords calls that arrive within
+    `window` seconds into one batched forward pass.
+    """
+
+    def __init__(
+        self,
+        extractor: SentenceBert | StatisticalKeywords | None = None,
+        window: float = 0.005,
+        max_batch_size: int = 32,
+    ):
+        self.extractor = extractor or get_extractor()
+        self.window = window
+        self.max_batch_size = max_batch_size
+        self._queue: Queue = Queue()
+        self._worker = threading.Thread(
+            target=self._run, name="keyword-batcher", daemon=True
+        )
+        self._worker.start()
+
+    def submit(self, sentence: str, top_n: int = 5) -> list[str]:
+        if not sentence or not sentence.strip():
+            return []
+
+        future: Future = Future()
+        self._queue.put((sentence, top_n, future))
+        return future.result()
+
+    def _collect(self) -> list:
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.window
+
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except Empty:
+                break
+
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+
+            # top_n changes the MMR selection, so only batch like with like
+            groups: dict[int, list] = {}
+            for item in batch:
+                groups.setdefault(item[1], []).append(item)
+
+            for top_n, items in groups.items():
+                try:
+                    results = self.extractor.extract_keywords_batch(
+                        [sentence for sentence, _, _ in items], top_n
+                    )
+                except Exception as exc:
+                    for _, _, future in items:
+                        future.set_exception(exc)
+                    continue
+
+                for (_, _, future), keywords in zip(items, results):
+                    future.set_result(keywords)
+
+
+_batcher: KeywordBatcher | None = None
+_batcher_lock = threading.Lock()
+
+
+def get_batcher() -> KeywordBatcher:
+    """Return the process-wide micro-batcher, starting it on first use."""
+    global _batcher
+    if _batcher is None:
+        with _batcher_lock:
+            if _batcher is None:
+                _batcher = KeywordBatcher()
+    return _batcher
+
+
+# -------------------------
+# Backend selection
+# -------------------------
+_statistical: StatisticalKeywords | None = None
+
+
+def get_extractor(backend: str | None = None) -> SentenceBert | StatisticalKeywords:
+    """Return the extractor for `backend` (defaults to KEYWORD_BACKEND)."""
+    global _statistical
+    backend = (backend or KEYWORD_BACKEND).lower()
+
+    if backend == "statistical":
+        if _statistical is None:
+            _statistical = StatisticalKeywords()
+        return _statistical
+    if backend == "keybert":
+        return SentenceBert()
+
+    raise ValueError(f"Unsupported keyword backend: {backend}")
+
+
+def extract_keywords(sentence: str, top_n: int = 5) -> list[str]:
+    """Extract keywords with the configured backend."""
+    if KEYWORD_BACKEND == "statistical":
+        return get_extractor().extract_keywords(sentence, top_n)
+    return get_batcher().submit(sentence, top_n)
@@ -0,0 +1,116 @@
+# src/keyword_extractor/statistical.py
+import json
+import logging
+import math
+import os
+import re
+from collections import Counter
+from typing import Iterable
+
+from sklearn.feature_extraction.text import ENGLISH_STOP_WORDS
+
+logger = logging.getLogger(__name__)
+
+IDF_PATH = os.getenv(
+    "KEYWORD_IDF_PATH",
+    os.path.join(os.path.dirname(__file__), "idf.json"),
+)
+
+_token_pattern = re.compile(r"[a-z][a-z0-9+#]*(?:[.-][a-z0-9+#]+)*")
+
+
+def tokenize(text: str) -> list[str]:
+    return [
+        token for token in _token_pattern.findall(text.lower())
+        if len(token) > 1 and token not in ENGLISH_STOP_WORDS
+    ]
+
+
+# -------------------------
+# IDF table
+# -------------------------
+def build_idf_table(documents: Iterable[str]) -> dict:
+    """Count document frequencies over a corpus (e.g. past prompts)."""
+    df: Counter = Counter()
+    total = 0
+    for doc in documents:
+        if not doc:
+            continue
+        total += 1
+        df.update(set(tokenize(doc)))
+    return {"documents": total, "df": dict(df)}
+
+
+def save_idf_table(table: dict, path: str = IDF_PATH):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(table, f)
+    os.replace(tmp_path, path)
+
+
+def load_idf_table(path: str = IDF_PATH) -> dict:
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        logger.info("No IDF table at %s, falling back to term frequency", path)
+    except (OSError, ValueError) as e:
+        logger.warning("Could not read IDF table %s: %s", path, e)
+    return {"documents": 0, "df": {}}
+
+
+# -------------------------
+# Extractor
+# -------------------------
+class StatisticalKeywords:
+    """
+    TF-IDF keyword extractor with a YAKE-style boost for terms that
+    appear early in the prompt. No model weights, so it starts instantly
+    and runs in microseconds; same interface as SentenceBert.
+    """
+
+    def __init__(self, idf_table: dict | None = None):
+        table = idf_table if idf_table is not None else load_idf_table()
+        self.df: dict[str, int] = table.get("df", {})
+        self.documents: int = table.get("documents", 0)
+
+    def idf(self, word: str) -> float:
+        # Smoothed like sklearn's TfidfVectorizer; unseen words score highest
+        return math.log((1 + self.documents) / (1 + self.df.get(word, 0))) + 1
+
+    def extract_keywords(self, sentence: str, top_n: int = 5) -> list[str]:
+        if not sentence or not sentence.strip():
+            return []
+
+        tokens = tokenize(sentence)
+        if not tokens:
+            return []
+
+        counts = Counter(tokens)
+        first_seen: dict[str, int] = {}
+        for position, token in enumerate(tokens):
+            first_seen.setdefault(token, position)
+
+        scores = {
+            word: tf * self.idf(word) * (1 + 1 / (1 + first_seen[word]))
+            for word, tf in counts.items()
+        }
+
+        # Cheap stand-in for MMR diversity: skip words sharing a stem prefix
+        selected: list[str] = []
+        stems: set[str] = set()
+        for word in sorted(scores, key=scores.get, reverse=True):
+            stem = word[:5]
+            if stem in stems:
+                continue
+            selected.append(word)
+            stems.add(stem)
+            if len(selected) == top_n:
+                break
+
+        return selected
+
+    def extract_keywords_batch(
+        self, sentences: list[str], top_n: int = 5
+    ) -> list[list[str]]:
+        return [self.extract_keywords(s, top_n) for s in sentences]
@@ -1 +1,6 @@
 from .llm import LLM
+from .async_llm import AsyncLLM
+from .cache import ResponseCache, response_cache
+from .clients import ClientRegistry, client_registry
+from .rate_limiter import TokenBucket, SQLiteTokenBucket, get_rate_limiter
+from .retry import DEADLINE_RESERVE, DeadlineExceeded, RetryPolicy, is_transient
@@ -0,0 +1,126 @@
+# src/llm/async_llm.py
+
+import asyncio
+import time
+from typing import AsyncIterator
+
+from langchain_core.output_parsers import StrOutputParser
+
+from .cache import response_cache
+from .clients import MODEL_PARAMS, client_registry
+from .llm import LLM
+from .rate_limiter import get_rate_limiter
+
+
+# -------------------------
+# Async LLM Wrapper
+# -------------------------
+class AsyncLLM(LLM):
+    """
+    asyncio counterpart of LLM. Shares its token budgets, response cache
+    and rate limiter, but awaits the provider (LangChain ainvoke/astream,
+    Gemini generate_content_async) over pooled per-provider connections,
+    so one worker can run many pipelines concurrently.
+    """
+
+    def __init__(self, base_model: str, api_key: str, agent_name: str = "default"):
+        if base_model not in MODEL_PARAMS:
+            raise ValueError(f"Unsupported base model: {base_model}")
+
+        self.base_model = base_model
+        self.api_key = api_key
+        self.agent_name = agent_name.lower()
+        self.rate_limiter = get_rate_limiter(base_model, api_key)
+
+        self.max_tokens = self.AGENT_TOKEN_LIMITS.get(
+            self.agent_name,
+            self.AGENT_TOKEN_LIMITS["default"]
+        )
+        self.cache_ttl = self.AGENT_CACHE_TTLS.get(self.agent_name)
+        self.model_params = MODEL_PARAMS[base_model]
+
+        # Built on first await so the HTTP pool binds to the running loop
+        self.model = None
+        self._loop = None
+
+    def _ensure_model(self):
+        loop = asyncio.get_running_loop()
+        if self.model is None or self._loop is not loop:
+            self.model = client_registry.get_async(
+                self.base_model, self.api_key, self.max_tokens
+            )
+            self._loop = loop
+
+    async def _acquire(self):
+        await self.rate_limiter.acquire_async()
+
+    # -------------------------
+    # Internal invoke (single attempt — retries belong to RetryPolicy)
+    # -------------------------
+    async def _agenerate(self, prompt: str) -> str:
+        self._ensure_model()
+        try:
+            await self._acquire()
+            if self.base_model == "Gemini-Pro":
+                response = await self.model.generate_content_async(prompt)
+                return response.text
+
+            chain = self.model | StrOutputParser()
+            return await chain.ainvoke(prompt)
+
+        except Exception as e:
+            raise RuntimeError(
+                f"LLM inference failed for model '{self.base_model}': {e}"
+            ) from e
+
+    # -------------------------
+    # Public inference
+    # -------------------------
+    async def inference(self, prompt: str) -> str:
+        if not self.cache_ttl:
+            return await self._agenerate(prompt)
+
+        key = self._cache_key(prompt)
+        cached = response_cache.get(key)
+        if cached is not None:
+            return cached
+
+        started = time.perf_counter()
+        response = await self._agenerate(prompt)
+        response_cache.set(key, response, self.cache_ttl, time.perf_counter() - started)
+        return response
+
+    async def stream(self, prompt: str) -> AsyncIterator[str]:
+        key = self._cache_key(prompt) if self.cache_ttl else None
+        if key:
+            cached = response_cache.get(key)
+            if cached is not None:
+                yield cached
+                return
+
+        self._ensure_model()
+        started = time.perf_counter()
+        parts = []
+        try:
+            await self._acquire()
+
+            if self.base_model == "Gemini-Pro":
+                response = await self.model.generate_content_async(prompt, stream=True)
+                chunks = (chunk.text async for chunk in response)
+            else:
+                chunks = (self.model | StrOutputParser()).astream(prompt)
+
+            async for chunk in chunks:
+                if chunk:
+                    parts.append(chunk)
+                    yield chunk
+
+        except Exception as e:
+            raise RuntimeError(
+                f"LLM streaming failed for model '{self.base_model}': {e}"
+            ) from e
+
+        if key:
+            response_cache.set(
+                key, "".join(parts), self.cache_ttl, time.perf_counter() - started
+            )
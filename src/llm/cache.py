@@ -0,0 +1,155 @@
+# src/llm/cache.py
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from src.sqlite_store import SQLiteStore
+
+logger = logging.getLogger(__name__)
+
+CACHE_SIZE = int(os.getenv("LLM_CACHE_SIZE", "1000"))
+
+# Set to a file path to keep responses across restarts and share them between workers
+CACHE_DB = os.getenv("LLM_CACHE_DB")
+# Expired rows are deleted by set() at most this often
+PURGE_INTERVAL = float(os.getenv("LLM_CACHE_PURGE_INTERVAL", "600"))
+
+
+def cache_key(base_model: str, params: dict, max_tokens: int, prompt: str) -> str:
+    """Deterministic key: identical model settings + prompt bytes -> same key."""
+    prompt_hash = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+    payload = json.dumps(
+        [base_model, params, max_tokens, prompt_hash], sort_keys=True
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache(SQLiteStore):
+    """
+    Two-tier prompt/response cache: an in-memory LRU with per-entry TTL,
+    backed by an optional SQLite table. Tracks hit ratio and the provider
+    latency that hits avoided.
+    """
+
+    def __init__(self, max_entries: int = CACHE_SIZE, path: str | None = CACHE_DB):
+        super().__init__(path)
+        self.max_entries = max_entries
+        # key -> (response, expires_at, latency)
+        self._entries: OrderedDict[str, tuple[str, float, float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.seconds_saved = 0.0
+        self._next_purge = time.time() + PURGE_INTERVAL
+
+        if self.path:
+            self._db().executescript(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, response TEXT NOT NULL, "
+                "expires_at REAL NOT NULL, latency REAL NOT NULL);"
+                "CREATE INDEX IF NOT EXISTS responses_expires_at ON responses (expires_at);"
+            )
+
+    def _remember(self, key: str, entry: tuple[str, float, float]):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _load(self, key: str) -> tuple[str, float, float] | None:
+        if not self.path:
+            return None
+        try:
+            return self._db().execute(
+                "SELECT response, expires_at, latency FROM responses WHERE key = ?",
+                (key,),
+            ).fetchone()
+        except sqlite3.Error as e:
+            logger.warning("LLM cache read failed: %s", e)
+            return None
+
+    def get(self, key: str) -> str | None:
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] <= now:
+                del self._entries[key]
+                entry = None
+
+        if entry is None:
+            entry = self._load(key)
+            if entry is not None and entry[1] <= now:
+                entry = None
+
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            self._remember(key, entry)
+            self.hits += 1
+            self.seconds_saved += entry[2]
+            return entry[0]
+
+    def set(self, key: str, response: str, ttl: float, latency: float):
+        now = time.time()
+        entry = (response, now + ttl, latency)
+        with self._lock:
+            self._remember(key, entry)
+            purge = now >= self._next_purge
+            if purge:
+                self._next_purge = now + PURGE_INTERVAL
+        if purge:
+            self.purge_expired()
+
+        if self.path:
+            try:
+                self._db().execute(
+                    "INSERT OR REPLACE INTO responses "
+                    "(key, response, expires_at, latency) VALUES (?, ?, ?, ?)",
+                    (key, *entry),
+                )
+            except sqlite3.Error as e:
+                logger.warning("LLM cache write failed: %s", e)
+
+    def delete(self, key: str):
+        with self._lock:
+            self._entries.pop(key, None)
+
+        if self.path:
+            try:
+                self._db().execute("DELETE FROM responses WHERE key = ?", (key,))
+            except sqlite3.Error as e:
+                logger.warning("LLM cache delete failed: %s", e)
+
+    def purge_expired(self):
+        now = time.time()
+        with self._lock:
+            for key in [k for k, e in self._entries.items() if e[1] <= now]:
+                del self._entries[key]
+
+        if self.path:
+            try:
+                self._db().execute("DELETE FROM responses WHERE expires_at <= ?", (now,))
+            except sqlite3.Error as e:
+                logger.warning("LLM cache purge failed: %s", e)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "seconds_saved": self.seconds_saved,
+            }
+
+
+response_cache = ResponseCache()
@@ -0,0 +1,247 @@
+# src/llm/clients.py
+
+import asyncio
+import hashlib
+import os
+import threading
+import time
+import weakref
+from collections import OrderedDict
+
+import httpx
+import google.generativeai as genai
+from google.generativeai import client as genai_client
+
+from langchain_cohere import ChatCohere
+from langchain_openai import ChatOpenAI
+
+HTTP_POOL_SIZE = int(os.getenv("LLM_HTTP_POOL_SIZE", "20"))
+HTTP_TIMEOUT = float(os.getenv("LLM_HTTP_TIMEOUT", "120"))
+
+CLIENT_CACHE_SIZE = int(os.getenv("LLM_CLIENT_CACHE_SIZE", "64"))
+CLIENT_IDLE_SECONDS = float(os.getenv("LLM_CLIENT_IDLE_SECONDS", "1800"))
+# An evicted client's pool stays open this long for calls already using it
+CLIENT_CLOSE_GRACE = float(os.getenv("LLM_CLIENT_CLOSE_GRACE", "600"))
+
+
+def _key(provider: str, api_key: str) -> tuple[str, str]:
+    return provider, hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:16]
+
+
+def _limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=HTTP_POOL_SIZE,
+        max_keepalive_connections=HTTP_POOL_SIZE,
+    )
+
+
+# -------------------------
+# Pooled HTTP clients
+# -------------------------
+# Gemini talks gRPC through genai's own channels, so only these get httpx pools
+HTTP_POOLED_MODELS = {"Cohere", "ChatGPT", "DeepSeek"}
+
+
+def _drop_closed_loops(per_loop: weakref.WeakKeyDictionary):
+    """A client can keep its loop alive, so weak keys alone don't free them."""
+    for loop in [loop for loop in list(per_loop.keys()) if loop.is_closed()]:
+        per_loop.pop(loop, None)
+
+
+# -------------------------
+# Provider models
+# -------------------------
+# Settings that change the completion; also part of the response cache key
+MODEL_PARAMS = {
+    "Gemini-Pro": {"model": "gemini-pro"},
+    "Cohere": {"temperature": 0.2},
+    "ChatGPT": {"model": "gpt-3.5-turbo", "temperature": 0.2},
+    "DeepSeek": {"model": "deepseek/deepseek-chat", "temperature": 0.2},
+}
+
+
+_genai_lock = threading.Lock()
+
+
+def _gemini_model(model_name: str, api_key: str):
+    """
+    genai only takes keys through the global configure(), so configure
+    and bind the model's clients under a lock. Once bound, later
+    configure() calls for other users' keys no longer affect this model.
+    """
+    with _genai_lock:
+        genai.configure(api_key=api_key)
+        model = genai.GenerativeModel(model_name)
+        model._client = genai_client.get_default_generative_client()
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            pass
+        else:
+            # grpc.aio channels belong to the loop they're created on
+            model._async_client = genai_client.get_default_generative_async_client()
+    return model
+
+
+def build_model(
+    base_model: str,
+    api_key: str,
+    max_tokens: int,
+    http_client: httpx.Client | None = None,
+    http_async_client: httpx.AsyncClient | None = None,
+):
+    """Construct the provider SDK object for `base_model`."""
+    params = MODEL_PARAMS.get(base_model)
+    if params is None:
+        raise ValueError(f"Unsupported base model: {base_model}")
+
+    # -------------------------
+    # Gemini
+    # -------------------------
+    if base_model == "Gemini-Pro":
+        return _gemini_model(params["model"], api_key)
+
+    # -------------------------
+    # Cohere
+    # -------------------------
+    if base_model == "Cohere":
+        model = ChatCohere(
+            cohere_api_key=api_key,
+            temperature=params["temperature"],
+            max_tokens=max_tokens,
+        )
+        # ChatCohere builds its SDK clients in a validator with no httpx
+        # parameter; rebuild them with the same class on the shared pool
+        sdk_args = {
+            "api_key": api_key,
+            "client_name": model.user_agent,
+            "timeout": model.timeout_seconds,
+            "base_url": model.base_url,
+        }
+        if http_client is not None:
+            model.client = type(model.client)(httpx_client=http_client, **sdk_args)
+        if http_async_client is not None:
+            model.async_client = type(model.async_client)(httpx_client=http_async_client, **sdk_args)
+        return model
+
+    # -------------------------
+    # ChatGPT / DeepSeek (OpenRouter)
+    # -------------------------
+    return ChatOpenAI(
+        openai_api_key=api_key,
+        model_name=params["model"],
+        base_url="https://openrouter.ai/api/v1" if base_model == "DeepSeek" else None,
+        temperature=params["temperature"],
+        max_tokens=max_tokens,
+        http_client=http_client,
+        http_async_client=http_async_client,
+    )
+
+
+# -------------------------
+# Client registry
+# -------------------------
+class ClientRegistry:
+    """
+    Bounded LRU of constructed provider clients, keyed by provider, hashed
+    API key and max_tokens (temperature is fixed per provider in
+    MODEL_PARAMS). Entries unused for `idle_seconds` are dropped.
+    Constructed clients are safe to share between threads. Async clients
+    are kept per event loop and dropped with it.
+
+    Each entry owns its httpx pool. An evicted entry's pool is closed
+    CLIENT_CLOSE_GRACE seconds later, so sockets don't pile up per user
+    while calls that already hold the client can finish.
+    """
+
+    def __init__(self, max_size: int = CLIENT_CACHE_SIZE, idle_seconds: float = CLIENT_IDLE_SECONDS):
+        self.max_size = max_size
+        self.idle_seconds = idle_seconds
+        # key -> [model, last_used, http client or None]
+        self._entries: OrderedDict[tuple, list] = OrderedDict()
+        self._async_entries: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, OrderedDict]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self._retired: list[tuple] = []  # (close_at, http client, loop or None)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _evict(self, entries: OrderedDict, loop, now: float):
+        while entries:
+            key, (_, last_used, http) = next(iter(entries.items()))
+            if now - last_used < self.idle_seconds and len(entries) <= self.max_size:
+                break
+            del entries[key]
+            if http is not None:
+                self._retired.append((now + CLIENT_CLOSE_GRACE, http, loop))
+
+    def _close_retired(self, loop, now: float):
+        """Close retired pools that are due; async ones only from their own loop."""
+        keep = []
+        for close_at, http, owner in self._retired:
+            if owner is not None and owner.is_closed():
+                continue  # nothing left to close it on
+            if close_at > now or owner is not loop:
+                keep.append((close_at, http, owner))
+            elif owner is None:
+                http.close()
+            else:
+                owner.create_task(http.aclose())
+        self._retired = keep
+
+    def get(self, base_model: str, api_key: str, max_tokens: int):
+        """Return a shared sync-pool client, building it on first use."""
+        def factory():
+            http = None
+            if base_model in HTTP_POOLED_MODELS:
+                http = httpx.Client(limits=_limits(), timeout=HTTP_TIMEOUT)
+            return build_model(base_model, api_key, max_tokens, http_client=http), http
+
+        return self._get(None, (*_key(base_model, api_key), max_tokens), factory)
+
+    def get_async(self, base_model: str, api_key: str, max_tokens: int):
+        """Return a client with its own async HTTP pool on the running loop."""
+        def factory():
+            http = None
+            if base_model in HTTP_POOLED_MODELS:
+                http = httpx.AsyncClient(limits=_limits(), timeout=HTTP_TIMEOUT)
+            return build_model(base_model, api_key, max_tokens, http_async_client=http), http
+
+        return self._get(asyncio.get_running_loop(), (*_key(base_model, api_key), max_tokens), factory)
+
+    def _get(self, loop, key: tuple, factory):
+        now = time.monotonic()
+        with self._lock:
+            if loop is None:
+                entries = self._entries
+            else:
+                _drop_closed_loops(self._async_entries)
+                entries = self._async_entries.setdefault(loop, OrderedDict())
+
+            entry = entries.get(key)
+            if entry is not None:
+                entry[1] = now
+                entries.move_to_end(key)
+                self.hits += 1
+                model = entry[0]
+            else:
+                # Built under the lock so concurrent first requests share one client
+                model, http = factory()
+                entries[key] = [model, now, http]
+                self.misses += 1
+
+            self._evict(entries, loop, now)
+            self._close_retired(loop, now)
+            return model
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "clients": len(self._entries) + sum(len(e) for e in self._async_entries.values()),
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+client_registry = ClientRegistry()
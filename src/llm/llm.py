@@ -1,43 +1,13 @@
 # src/llm/llm.py
 
-import os
 import time
-import google.generativeai as genai
+from typing import Iterator
 
-from langchain_cohere import ChatCohere
-from langchain_openai import ChatOpenAI
 from langchain_core.output_parsers import StrOutputParser
 
-from tenacity import (
-    retry,
-    stop_after_attempt,
-    wait_exponential,
-    retry_if_exception_type,
-)
-
-from openai import RateLimitError
-
-
-# -------------------------
-# Rate Limiter
-# -------------------------
-class RateLimiter:
-    def __init__(self, max_calls: int, period: int):
-        self.max_calls = max_calls
-        self.period = period
-        self.calls: list[float] = []
-
-    def __enter__(self):
-        while True:
-            now = time.time()
-            self.calls = [t for t in self.calls if now - t < self.period]
-            if len(self.calls) < self.max_calls:
-                self.calls.append(now)
-                return
-            time.sleep(0.1)
-
-    def __exit__(self, exc_type, exc_val, exc_tb):
-        return False
+from .cache import cache_key, response_cache
+from .clients import MODEL_PARAMS, client_registry
+from .rate_limiter import get_rate_limiter
 
 
 # -------------------------
@@ -59,86 +29,110 @@ class LLM:
         "default": 2048,
     }
 
+    # 🗄️ RESPONSE CACHE TTL PER AGENT (seconds) — agents not listed are never cached
+    AGENT_CACHE_TTLS = {
+        "decision_taker": 3600,
+        "planner": 3600,
+        "researcher": 3600,
+    }
+
     def __init__(self, base_model: str, api_key: str, agent_name: str = "default"):
         self.base_model = base_model
         self.agent_name = agent_name.lower()
-        self.rate_limiter = RateLimiter(max_calls=10, period=60)
+        self.rate_limiter = get_rate_limiter(base_model, api_key)
 
         # 🎯 Resolve token limit
         self.max_tokens = self.AGENT_TOKEN_LIMITS.get(
             self.agent_name,
             self.AGENT_TOKEN_LIMITS["default"]
         )
+        self.cache_ttl = self.AGENT_CACHE_TTLS.get(self.agent_name)
 
-        # -------------------------
-        # Gemini
-        # -------------------------
-        if base_model == "Gemini-Pro":
-            os.environ["GOOGLE_API_KEY"] = api_key
-            genai.configure(api_key=api_key)
-            self.model = genai.GenerativeModel("gemini-pro")
-
-        # -------------------------
-        # Cohere
-        # -------------------------
-        elif base_model == "Cohere":
-            self.model = ChatCohere(
-                cohere_api_key=api_key,
-                temperature=0.2,
-                max_tokens=self.max_tokens,
-            )
-
-        # -------------------------
-        # ChatGPT
-        # -------------------------
-        elif base_model == "ChatGPT":
-            self.model = ChatOpenAI(
-                openai_api_key=api_key,
-                model_name="gpt-3.5-turbo",
-                temperature=0.2,
-                max_tokens=self.max_tokens,
-            )
-
-        # -------------------------
-        # DeepSeek (OpenRouter)
-        # -------------------------
-        elif base_model == "DeepSeek":
-            self.model = ChatOpenAI(
-                openai_api_key=api_key,
-                model_name="deepseek/deepseek-chat",
-                base_url="https://openrouter.ai/api/v1",
-                temperature=0.2,
-                max_tokens=self.max_tokens,
-            )
-
-        else:
+        if base_model not in MODEL_PARAMS:
             raise ValueError(f"Unsupported base model: {base_model}")
 
+        # Shared, already-built provider client; constructing an agent is cheap
+        self.model = client_registry.get(base_model, api_key, self.max_tokens)
+        self.model_params = MODEL_PARAMS[base_model]
+
     # -------------------------
-    # Internal invoke with retry
+    # Internal invoke (single attempt — retries belong to RetryPolicy)
     # -------------------------
-    @retry(
-        wait=wait_exponential(multiplier=1, min=4, max=20),
-        stop=stop_after_attempt(5),
-        retry=retry_if_exception_type(RateLimitError),
-        reraise=True,
-    )
-    def _invoke(self, chain, prompt: str):
-        with self.rate_limiter:
-            return chain.invoke(prompt)
+    def _generate(self, prompt: str) -> str:
+        try:
+            with self.rate_limiter:
+                if self.base_model == "Gemini-Pro":
+                    return self.model.generate_content(prompt).text
+
+                chain = self.model | StrOutputParser()
+                return chain.invoke(prompt)
+
+        except Exception as e:
+            raise RuntimeError(
+                f"LLM inference failed for model '{self.base_model}': {e}"
+            ) from e
 
     # -------------------------
     # Public inference
     # -------------------------
+    def _cache_key(self, prompt: str) -> str:
+        return cache_key(self.base_model, self.model_params, self.max_tokens, prompt)
+
     def inference(self, prompt: str) -> str:
+        if not self.cache_ttl:
+            return self._generate(prompt)
+
+        key = self._cache_key(prompt)
+        cached = response_cache.get(key)
+        if cached is not None:
+            return cached
+
+        started = time.perf_counter()
+        response = self._generate(prompt)
+        response_cache.set(key, response, self.cache_ttl, time.perf_counter() - started)
+        return response
+
+    def stream(self, prompt: str) -> Iterator[str]:
+        """
+        Yield the completion in chunks as the provider produces them.
+        Cached responses are replayed as a single chunk.
+        """
+        key = self._cache_key(prompt) if self.cache_ttl else None
+        if key:
+            cached = response_cache.get(key)
+            if cached is not None:
+                yield cached
+                return
+
+        started = time.perf_counter()
+        parts = []
         try:
-            if self.base_model == "Gemini-Pro":
-                return self.model.generate_content(prompt).text
+            self.rate_limiter.acquire()
 
-            chain = self.model | StrOutputParser()
-            return self._invoke(chain, prompt)
+            if self.base_model == "Gemini-Pro":
+                chunks = (
+                    chunk.text
+                    for chunk in self.model.generate_content(prompt, stream=True)
+                )
+            else:
+                chunks = (self.model | StrOutputParser()).stream(prompt)
+
+            for chunk in chunks:
+                if chunk:
+                    parts.append(chunk)
+                    yield chunk
 
         except Exception as e:
             raise RuntimeError(
-                f"LLM inference failed for model '{self.base_model}': {e}"
+                f"LLM streaming failed for model '{self.base_model}': {e}"
+            ) from e
+
+        if key:
+            response_cache.set(
+                key, "".join(parts), self.cache_ttl, time.perf_counter() - started
             )
+
+    def invalidate(self, prompt: str):
+        """Drop a cached response, e.g. one the agent rejected as malformed."""
+        if self.cache_ttl:
+            response_cache.delete(self._cache_key(prompt))
@@ -0,0 +1,182 @@
+# src/llm/rate_limiter.py
+
+import asyncio
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+RATE_LIMIT_CALLS = int(os.getenv("LLM_RATE_LIMIT_CALLS", "10"))
+RATE_LIMIT_PERIOD = float(os.getenv("LLM_RATE_LIMIT_PERIOD", "60"))
+
+# Set to a file path to share one budget across all gunicorn workers
+RATE_LIMIT_DB = os.getenv("LLM_RATE_LIMIT_DB")
+
+
+# -------------------------
+# In-process token bucket
+# -------------------------
+class TokenBucket:
+    """
+    Thread-safe token bucket. Holds up to `capacity` tokens and refills
+    at capacity/period per second. Waiters sleep on a condition variable
+    until the next token is due instead of polling.
+    """
+
+    def __init__(self, capacity: int, period: float):
+        self.capacity = capacity
+        self.rate = capacity / period
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self._cond = threading.Condition()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self):
+        with self._cond:
+            while True:
+                self._refill(time.monotonic())
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    # Let the next waiter re-check rather than oversleep
+                    if self.tokens >= 1:
+                        self._cond.notify()
+                    return
+                self._cond.wait((1 - self.tokens) / self.rate)
+
+    async def acquire_async(self):
+        """acquire() for coroutines: waits on the event loop, not a thread."""
+        while True:
+            with self._cond:
+                self._refill(time.monotonic())
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    if self.tokens >= 1:
+                        self._cond.notify()
+                    return
+                wait = (1 - self.tokens) / self.rate
+            await asyncio.sleep(wait)
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        return False
+
+
+# -------------------------
+# Cross-process token bucket
+# -------------------------
+class SQLiteTokenBucket(TokenBucket):
+    """
+    Token bucket whose state lives in a SQLite row so every process
+    pointing at the same file draws from one budget.
+    """
+
+    def __init__(self, key: str, capacity: int, period: float, path: str):
+        super().__init__(capacity, period)
+        self.key = key
+        self.path = path
+        conn = self._connect()
+        try:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS buckets ("
+                "key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)"
+            )
+        finally:
+            conn.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=30, isolation_level=None)
+
+    def _try_take(self, conn: sqlite3.Connection) -> float:
+        """Take a token if available; otherwise return seconds until one is."""
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT tokens, updated FROM buckets WHERE key = ?", (self.key,)
+            ).fetchone()
+            tokens, updated = row if row else (float(self.capacity), now)
+            tokens = min(self.capacity, tokens + max(0.0, now - updated) * self.rate)
+
+            wait = 0.0
+            if tokens >= 1:
+                tokens -= 1
+            else:
+                wait = (1 - tokens) / self.rate
+
+            conn.execute(
+                "INSERT OR REPLACE INTO buckets (key, tokens, updated) VALUES (?, ?, ?)",
+                (self.key, tokens, now),
+            )
+            conn.execute("COMMIT")
+            return wait
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def acquire(self):
+        # Threads in this process queue on the condition; one at a time
+        # goes to the database so they don't all hammer the write lock
+        with self._cond:
+            conn = self._connect()
+            try:
+                while True:
+                    wait = self._try_take(conn)
+                    if not wait:
+                        return
+                    self._cond.wait(wait)
+            finally:
+                conn.close()
+
+    def _take_once(self) -> float:
+        conn = self._connect()
+        try:
+            return self._try_take(conn)
+        finally:
+            conn.close()
+
+    async def acquire_async(self):
+        # Only the short database transaction runs in a thread; the wait
+        # for the next token sleeps on the event loop
+        while True:
+            wait = await asyncio.to_thread(self._take_once)
+            if not wait:
+                return
+            await asyncio.sleep(wait)
+
+
+# -------------------------
+# Shared registry
+# -------------------------
+_buckets: dict[tuple[str, str], TokenBucket] = {}
+_buckets_lock = threading.Lock()
+
+
+def get_rate_limiter(provider: str, api_key: str) -> TokenBucket:
+    """
+    Return the limiter shared by every LLM using this provider and key.
+    API keys are hashed so they never land in the rate-limit database.
+    """
+    key_hash = hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:16]
+    bucket_key = (provider, key_hash)
+
+    with _buckets_lock:
+        bucket = _buckets.get(bucket_key)
+        if bucket is None:
+            if RATE_LIMIT_DB:
+                bucket = SQLiteTokenBucket(
+                    f"{provider}:{key_hash}",
+                    RATE_LIMIT_CALLS,
+                    RATE_LIMIT_PERIOD,
+                    RATE_LIMIT_DB,
+                )
+            else:
+                bucket = TokenBucket(RATE_LIMIT_CALLS, RATE_LIMIT_PERIOD)
+            _buckets[bucket_key] = bucket
+        return bucket
@@ -0,0 +1,172 @@
+# src/llm/retry.py
+
+import asyncio
+import logging
+import os
+import random
+import time
+
+import httpx
+import openai
+from google.api_core import exceptions as google_exceptions
+
+logger = logging.getLogger(__name__)
+
+MAX_ATTEMPTS = int(os.getenv("LLM_MAX_ATTEMPTS", "3"))
+REQUEST_DEADLINE = float(os.getenv("LLM_REQUEST_DEADLINE", "300"))
+# Part of the deadline code generation leaves for project creation and saving
+DEADLINE_RESERVE = float(os.getenv("LLM_DEADLINE_RESERVE", "45"))
+
+TRANSIENT_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504, 529}
+
+TRANSIENT_EXCEPTIONS = (
+    # OpenAI / OpenRouter
+    openai.RateLimitError,
+    openai.APITimeoutError,
+    openai.APIConnectionError,
+    openai.InternalServerError,
+    # Gemini
+    google_exceptions.ResourceExhausted,
+    google_exceptions.ServiceUnavailable,
+    google_exceptions.DeadlineExceeded,
+    google_exceptions.InternalServerError,
+    # Raw transport errors (Cohere and anything else over httpx)
+    httpx.TimeoutException,
+    httpx.NetworkError,
+    TimeoutError,
+    ConnectionError,
+)
+
+
+class DeadlineExceeded(RuntimeError):
+    """The request's total LLM time budget ran out."""
+
+
+def is_transient(exc: BaseException) -> bool:
+    """
+    True for errors worth retrying: rate limits, timeouts, dropped
+    connections and 5xx. Walks the __cause__ chain so errors wrapped
+    by LLM are still classified.
+    """
+    while exc is not None:
+        if isinstance(exc, TRANSIENT_EXCEPTIONS):
+            return True
+        # Cohere's SDK errors carry the HTTP status
+        if getattr(exc, "status_code", None) in TRANSIENT_STATUS_CODES:
+            return True
+        exc = exc.__cause__
+    return False
+
+
+class RetryPolicy:
+    """
+    One retry budget for a whole request: every agent and every LLM call
+    in the request shares the same deadline. Only transient errors are
+    retried, with jittered exponential backoff, and each attempt's timing
+    is recorded.
+    """
+
+    def __init__(
+        self,
+        max_attempts: int = MAX_ATTEMPTS,
+        deadline: float | None = REQUEST_DEADLINE,
+        base_delay: float = 1.0,
+        max_delay: float = 20.0,
+    ):
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.expires_at = time.monotonic() + deadline if deadline else None
+        self.attempts: list[dict] = []
+
+    # -------------------------
+    # Budget
+    # -------------------------
+    def remaining(self) -> float | None:
+        if self.expires_at is None:
+            return None
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self, reserve: float = 0.0) -> bool:
+        """True once no more than `reserve` seconds of the deadline are left."""
+        remaining = self.remaining()
+        return remaining is not None and remaining <= reserve
+
+    def check(self, label: str, reserve: float = 0.0):
+        if self.expired(reserve):
+            raise DeadlineExceeded(f"{label}: request deadline exceeded")
+
+    def _delay(self, attempt: int, reserve: float = 0.0) -> float:
+        delay = min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+        delay *= random.uniform(0.5, 1.0)
+        remaining = self.remaining()
+        return delay if remaining is None else min(delay, remaining - reserve)
+
+    # -------------------------
+    # Telemetry
+    # -------------------------
+    def record(self, label: str, attempt: int, started: float, error: BaseException | None = None):
+        entry = {
+            "label": label,
+            "attempt": attempt,
+            "seconds": round(time.monotonic() - started, 3),
+            "ok": error is None,
+        }
+        if error is not None:
+            entry["error"] = type(error).__name__
+            entry["transient"] = is_transient(error)
+            logger.warning(
+                "%s attempt %s/%s failed after %.2fs: %s",
+                label, attempt, self.max_attempts, entry["seconds"], error
+            )
+        else:
+            logger.info("%s attempt %s took %.2fs", label, attempt, entry["seconds"])
+        self.attempts.append(entry)
+
+    def summary(self) -> dict:
+        return {
+            "attempts": len(self.attempts),
+            "failures": sum(1 for a in self.attempts if not a["ok"]),
+            "seconds": round(sum(a["seconds"] for a in self.attempts), 3),
+        }
+
+    # -------------------------
+    # Retrying
+    # -------------------------
+    def should_retry(self, exc: BaseException, attempt: int, reserve: float = 0.0) -> float | None:
+        """Seconds to back off before the next attempt, or None to give up."""
+        if attempt >= self.max_attempts or not is_transient(exc) or self.expired(reserve):
+            return None
+        return self._delay(attempt, reserve)
+
+    def call(self, label: str, fn, *args, **kwargs):
+        for attempt in range(1, self.max_attempts + 1):
+            self.check(label)
+            started = time.monotonic()
+            try:
+                result = fn(*args, **kwargs)
+            except Exception as exc:
+                self.record(label, attempt, started, exc)
+                delay = self.should_retry(exc, attempt)
+                if delay is None:
+                    raise
+                time.sleep(delay)
+                continue
+            self.record(label, attempt, started)
+            return result
+
+    async def acall(self, label: str, fn, *args, **kwargs):
+        for attempt in range(1, self.max_attempts + 1):
+            self.check(label)
+            started = time.monotonic()
+            try:
+                result = await fn(*args, **kwargs)
+            except Exception as exc:
+                self.record(label, attempt, started, exc)
+                delay = self.should_retry(exc, attempt)
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+                continue
+            self.record(label, attempt, started)
+            return result
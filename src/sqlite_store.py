@@ -0,0 +1,39 @@
+# src/sqlite_store.py
+import sqlite3
+import threading
+
+
+class SQLiteStore:
+    """
+    Base for caches kept in a SQLite file shared by every thread and worker.
+    sqlite3 connections can't cross threads, so each thread gets its own,
+    in autocommit mode with WAL so readers don't block the writer.
+    """
+
+    def __init__(self, path: str | None):
+        self.path = path
+        self._local = threading.local()
+        self._stats_lock = threading.Lock()
+
+    def _db(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def _count(self, name: str, amount: float = 1):
+        with self._stats_lock:
+            setattr(self, name, getattr(self, name) + amount)
+
+
+def open_default(factory, path: str | None, label: str):
+    """The module-level instance, or None if `path` is empty or the file can't be opened."""
+    if not path:
+        return None
+    try:
+        return factory()
+    except sqlite3.Error as e:
+        print(f"{label} disabled: {e}")
+        return None
@@ -0,0 +1,30 @@
+# src/tokens.py
+import os
+import threading
+
+import tiktoken
+
+TOKEN_ENCODING = os.getenv("BROWSER_TOKEN_ENCODING", "cl100k_base")
+
+_encoding = None
+_encoding_lock = threading.Lock()
+
+
+def get_encoding():
+    global _encoding
+    if _encoding is None:
+        with _encoding_lock:
+            if _encoding is None:
+                _encoding = tiktoken.get_encoding(TOKEN_ENCODING)
+    return _encoding
+
+
+def count_tokens(text: str) -> int:
+    return len(get_encoding().encode(text, disallowed_special=()))
+
+
+def truncate_tokens(text: str, budget: int) -> str:
+    tokens = get_encoding().encode(text, disallowed_special=())
+    if len(tokens) <= budget:
+        return text
+    return get_encoding().decode(tokens[:budget])
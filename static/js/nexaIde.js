@@ -77,7 +77,10 @@ function normalizeServerFiles(serverFiles) {
         normalized[path] = {
             name: path.split('/').pop(),
             path,
-            content: data.content || '',
+            // Listings carry metadata only; content is fetched on open
+            content: data.content ?? null,
+            size: data.size,
+            etag: data.etag,
             language: detectLanguage(path),
             lastModified: data.last_modified || new Date().toISOString()
         };
@@ -114,10 +117,27 @@ async function loadWorkspaceProject() {
 // -------------------------------
 // File Operations
 // -------------------------------
-function openFile(filePath) {
+async function fetchFileContent(filePath) {
+    // The browser revalidates with If-None-Match and reuses its copy on 304
+    const res = await fetch(`/api/ide/file?path=${encodeURIComponent(filePath)}`);
+    if (!res.ok) throw new Error(`Failed to load ${filePath}`);
+    const data = await res.json();
+    return data.content || '';
+}
+
+async function openFile(filePath) {
     const file = ideState.files[filePath];
     if (!file) return;
 
+    if (file.content === null || file.content === undefined) {
+        try {
+            file.content = await fetchFileContent(filePath);
+        } catch (err) {
+            console.error(err);
+            return;
+        }
+    }
+
     if (!ideState.openFiles.includes(filePath)) {
         ideState.openFiles.push(filePath);
     }
@@ -96,6 +96,10 @@ document.addEventListener('DOMContentLoaded', function() {
                     case 'conversation':
                         addMessage('assistant', msg.content);
                         break;
+                    case 'planner_delta':
+                    case 'coder_delta':
+                        appendDelta(msg);
+                        break;
                     case 'planner':
                     case 'keywords':
                     case 'researcher':
@@ -139,6 +143,24 @@ document.addEventListener('DOMContentLoaded', function() {
         chatMessages.scrollTop = chatMessages.scrollHeight;
     }
 
+    function appendDelta(msg) {
+        // Show raw model output in the tab while it streams in;
+        // updateWorkspace() replaces it with the parsed result
+        const tab = document.getElementById(msg.type === 'planner_delta' ? 'planner' : 'coder');
+        let pre = tab.querySelector('pre[data-stream]');
+
+        if (!pre || pre.dataset.attempt !== String(msg.attempt)) {
+            tab.innerHTML = '';
+            pre = document.createElement('pre');
+            pre.dataset.stream = 'true';
+            pre.dataset.attempt = String(msg.attempt);
+            pre.className = 'whitespace-pre-wrap bg-gray-50 p-2 rounded text-sm';
+            tab.appendChild(pre);
+        }
+
+        pre.textContent += msg.delta;
+    }
+
     function updateWorkspace(data) {
         // -------------------
         // PLANNER TAB
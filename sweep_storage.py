@@ -0,0 +1,14 @@
+# sweep_storage.py
+from s3.s3_client import sweep_storage
+
+
+def sweep():
+    result = sweep_storage()
+    print(
+        f"Kept {result['referenced']} blobs, deleted {result['deleted_blobs']} blobs "
+        f"and {result['deleted_legacy_objects']} migrated objects in {result['seconds']}s"
+    )
+
+
+if __name__ == "__main__":
+    sweep()
@@ -2,10 +2,7 @@
 import json
 import re
 import time
-from src.browser import GoogleSearch, Browser
-
-browser = Browser()
-google_search = GoogleSearch()
+from src.browser import fetch_all
 
 def stream_text(text):
     for word in text.split(" "):
@@ -13,22 +10,8 @@ def stream_text(text):
         time.sleep(0.005)
 
 def search_queries(queries):
-    results = {}
-    for query in queries:
-        query = query.strip().lower()
-        google_search.search(query)
-        link = google_search.get_first_link()
-        if link is None:
-            print(f"No search results found for: {query}")
-            results[query] = {"link": None, "content": ""}
-            continue
-        if not link.startswith(("http://", "https://")):
-            print(f"Invalid link found: {link}")
-            results[query] = {"link": None, "content": ""}
-            continue
-        browser.go_to(link)
-        results[query] = {"link": link, "content": browser.extract_text().strip()}
-    return results
+    """Search and fetch all queries concurrently; see src/browser/fetcher.py."""
+    return fetch_all(queries)
 
 def clean_file_path(file_path: str) -> str:
     """Clean and normalize a file path, fixing flattened paths"""